@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app._njit import njit
+from app.indicators import wilder_atr
+
+# th vector layout (float64)
+TH_EMA_GAP = 0
+TH_VOL_RATIO = 1
+TH_WICK_MAX = 2
+TH_MOM_MIN = 3
+TH_SPREAD_MAX = 4
+TH_SIZE = 5
+
+
+@njit(cache=True, fastmath=True)
+def _score_kernel(o, h, lo, c_last, c_prev, vol_last, vol_avg, brk_hi, brk_lo, spread, th):
+    """
+    Numeric core của score_signal (chưa gồm ATR squeeze).
+
+    Input là scalar của bar cuối + rolling state từ CandleBuffer (O(1)).
+    returns (score, ema_gap, vol_ratio, wick_ok, mom_ok, breakout_ok, spread_ok)
+    score == 0 nghĩa là bị loại ở volume gate.
+    """
+    # EMA gap: |diff| / c_prev (fastmath -> fabs + div, không gọi abs() của Python)
+    diff = c_last - c_prev
+    gap = (diff if diff >= 0.0 else -diff) / c_prev if c_prev != 0.0 else 0.0
+
+    # Volume spike (mandatory)
+    vol_ratio = vol_last / max(vol_avg, 1e-9)
+    if vol_ratio < th[TH_VOL_RATIO]:
+        return 0, gap, vol_ratio, False, False, False, False
+
+    # Wick / momentum của bar cuối
+    rng = max(h - lo, 1e-12)
+    upper = max(0.0, h - max(o, c_last))
+    lower = max(0.0, min(o, c_last) - lo)
+    wick_ok = (upper + lower) / rng <= th[TH_WICK_MAX]
+
+    body = c_last - o
+    mom = (body if body >= 0.0 else -body) / o if o != 0.0 else 0.0
+    mom_ok = mom >= th[TH_MOM_MIN]
+
+    # Breakout high/low lookback (brk_hi/brk_lo = +/-inf khi chưa đủ bar)
+    breakout_ok = (c_last > brk_hi) | (c_last < brk_lo)
+
+    spread_ok = spread <= th[TH_SPREAD_MAX]
+
+    # branchless: bool -> 0/1 (SETcc thay vì nhánh)
+    score = (
+        3
+        + 2 * np.int64(gap >= th[TH_EMA_GAP])
+        + 2 * np.int64(wick_ok)
+        + 2 * np.int64(mom_ok)
+        + 3 * np.int64(breakout_ok)
+        + np.int64(spread_ok)
+    )
+
+    return score, gap, vol_ratio, wick_ok, mom_ok, breakout_ok, spread_ok
+
+
+# AOT build (python -m app._kernels_build) nếu có, fallback JIT
+try:
+    from app.score_kernel import score_kernel as _aot_score_kernel  # type: ignore
+except ImportError:
+    _aot_score_kernel = None
+
+score_kernel = _aot_score_kernel or _score_kernel
+
+
+def warmup() -> None:
+    """
+    Gọi kernel 1 lần với data giả để JIT compile trước tick đầu tiên.
+    Bản AOT không cần warmup.
+    """
+    th = np.zeros(TH_SIZE, dtype=np.float64)
+    wilder_atr(th, th, th, 2)
+    if _aot_score_kernel is not None:
+        return
+    _score_kernel(1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 0.0, th)
@@ -0,0 +1,38 @@
+"""
+AOT build cho score kernel + indicator kernels (numba.pycc)
+-> app/score_kernel*.so, app/indicators_aot*.so
+
+    python -m app._kernels_build
+
+Chạy lúc docker build để process khởi động không phải JIT compile.
+"""
+from __future__ import annotations
+
+import os
+
+from numba.pycc import CC
+
+from app._kernels import _score_kernel
+from app.indicators import _wilder_atr_kernel
+
+_OUT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCORE_KERNEL_SIG = (
+    "Tuple((i8, f8, f8, b1, b1, b1, b1))"
+    "(f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8[:])"
+)
+
+WILDER_ATR_SIG = "f8(f8[:], f8[:], f8[:], i8)"
+
+cc = CC("score_kernel")
+cc.output_dir = _OUT_DIR
+cc.export("score_kernel", SCORE_KERNEL_SIG)(getattr(_score_kernel, "py_func", _score_kernel))
+
+cc_ind = CC("indicators_aot")
+cc_ind.output_dir = _OUT_DIR
+cc_ind.export("wilder_atr", WILDER_ATR_SIG)(getattr(_wilder_atr_kernel, "py_func", _wilder_atr_kernel))
+
+
+if __name__ == "__main__":
+    cc.compile()
+    cc_ind.compile()
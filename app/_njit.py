@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+# numba là optional: không có thì kernel chạy như Python/numpy thường
+try:
+    from numba import njit  # type: ignore
+except Exception:
+    def njit(*args, **kwargs):  # type: ignore[no-redef]
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def deco(fn):
+            return fn
+
+        return deco
+
+
+__all__ = ["njit"]
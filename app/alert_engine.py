@@ -1,37 +1,101 @@
 from __future__ import annotations
 
 import time
+from dataclasses import dataclass
+from typing import NamedTuple
 
+import numpy as np
+
+from app._kernels import score_kernel
+from app.candle_buffer import CandleBuffer
 from app.config import CFG
 from app.filters import (
     pick_thresholds,
-    filter_wick,
-    filter_momentum,
     atr_compression,
 )
 
-_last_alert_time = {"early": 0.0, "main": 0.0}
+# monotonic clock (ns): không bị NTP step làm lệch cooldown.
+# Khởi tạo rất âm vì monotonic_ns có thể < cooldown ngay sau boot.
+_NEVER_NS = -(1 << 62)
+_last_alert_time_ns = {"early": _NEVER_NS, "main": _NEVER_NS}
 
 
 def _get(name: str, default):
     return getattr(CFG, name, default)
 
 
+@dataclass(frozen=True, slots=True)
+class ScoreMeta:
+    ema_gap: float = 0.0
+    volume_ratio: float = 0.0
+    wick_ok: bool = False
+    momentum_ok: bool = False
+    atr_squeeze: bool = True
+    breakout_highlow: bool = False
+    spread: float = 0.0
+    spread_ok: bool = False
+    atr5_pct: float | None = None
+    atr20_pct: float | None = None
+    squeeze_ratio: float | None = None
+
+
+_EMPTY_META = ScoreMeta()
+
+
+class _ThConst(NamedTuple):
+    ema_gap: float
+    vol_ratio: float
+    wick_max: float
+    mom_min: float
+    spread_max: float
+    cooldown: int
+
+
+# CFG frozen lúc import -> threshold/flag tính 1 lần
+_TH_EARLY = _ThConst(**pick_thresholds("early"))
+_TH_MAIN = _ThConst(**pick_thresholds("main"))
+_TH = {"early": _TH_EARLY, "main": _TH_MAIN}
+_COOLDOWN_NS = {m: int(th.cooldown) * 1_000_000_000 for m, th in _TH.items()}
+
+_ENABLE_WICK = bool(CFG.ENABLE_WICK_FILTER)
+_ENABLE_MOMENTUM = bool(CFG.ENABLE_MOMENTUM)
+_ENABLE_ATR = int(_get("ENABLE_ATR_COMPRESSION", 0))
+_SCORE_MIN_EARLY = int(_get("SCORE_MIN_EARLY", 6))
+_SCORE_MIN_MAIN = int(_get("SCORE_MIN_MAIN", 10))
+_SCORE_MIN_MAIN_PANIC = int(_get("SCORE_MIN_MAIN_PANIC", 13))
+_SCORE_HIGH_CONF = int(_get("SCORE_HIGH_CONF", 14))
+
+
+def _th_vector(th: _ThConst) -> np.ndarray:
+    """
+    Threshold vector cho kernel (layout TH_* trong app._kernels).
+    Filter tắt -> ngưỡng vô cực để luôn pass.
+    """
+    return np.array(
+        (
+            th.ema_gap,
+            th.vol_ratio,
+            th.wick_max if _ENABLE_WICK else np.inf,
+            th.mom_min if _ENABLE_MOMENTUM else -np.inf,
+            th.spread_max,
+        ),
+        dtype=np.float64,
+    )
+
+
+_TH_ARR = {m: _th_vector(th) for m, th in _TH.items()}
+
+
 # ============================================================
 # BREAKOUT LEVEL CHECK
 # ============================================================
-def breakout_level(candles: list[dict], lookback: int = 20) -> bool:
+def breakout_level(candles: CandleBuffer) -> bool:
     """
     Breakout thật = close phá high/low lookback gần nhất
+    (rolling high/low do CandleBuffer duy trì, inf khi chưa đủ bar)
     """
-    if len(candles) < lookback + 1:
-        return False
-
-    last = candles[-1]
-    highs = [c["high"] for c in candles[-lookback - 1 : -1]]
-    lows = [c["low"] for c in candles[-lookback - 1 : -1]]
-
-    return (last["close"] > max(highs)) or (last["close"] < min(lows))
+    c = candles.closes[-1]
+    return bool(c > candles.breakout_high or c < candles.breakout_low)
 
 
 # ============================================================
@@ -39,90 +103,60 @@ def breakout_level(candles: list[dict], lookback: int = 20) -> bool:
 # ============================================================
 def score_signal(
     symbol: str,
-    candles: list[dict],
-    volumes: list[float],
+    candles: CandleBuffer,
     spread: float,
     mode: str,
-) -> tuple[int, dict]:
+) -> tuple[int, ScoreMeta]:
 
-    th = pick_thresholds(mode)
-    score = 0
-    reasons: dict = {}
+    th_arr = _TH_ARR[mode]
 
-    last = candles[-1]
-
-    # ========================================================
-    # EMA GAP
-    # ========================================================
-    ema_fast = candles[-1]["close"]
-    ema_slow = candles[-2]["close"]
-    gap = abs(ema_fast - ema_slow) / ema_slow if ema_slow else 0.0
+    # volume SMA chưa đủ bar
+    vol_avg = candles.vol_avg
+    if vol_avg is None:
+        return 0, _EMPTY_META
 
-    reasons["ema_gap"] = gap
-    if gap >= th["ema_gap"]:
-        score += 2
+    highs = candles.highs
+    lows = candles.lows
+    closes = candles.closes
 
     # ========================================================
-    # VOLUME SPIKE (MANDATORY)
+    # EMA GAP / VOLUME / WICK / MOMENTUM / BREAKOUT / SPREAD (njit)
     # ========================================================
-    if len(volumes) < CFG.VOLUME_SMA_LEN:
-        return 0, reasons
-
-    avg = sum(volumes[-CFG.VOLUME_SMA_LEN :]) / CFG.VOLUME_SMA_LEN
-    vol_ratio = volumes[-1] / max(avg, 1e-9)
-
-    reasons["volume_ratio"] = vol_ratio
+    score, gap, vol_ratio, wick_ok, mom_ok, breakout_ok, spread_ok = score_kernel(
+        float(candles.opens[-1]), float(highs[-1]), float(lows[-1]),
+        float(closes[-1]), float(closes[-2]),
+        float(candles.volumes[-1]), vol_avg,
+        candles.breakout_high, candles.breakout_low,
+        float(spread), th_arr,
+    )
 
     # Volume bắt buộc theo env
-    if vol_ratio < th["vol_ratio"]:
-        return 0, reasons
-
-    score += 3
-
-    # ========================================================
-    # WICK FILTER
-    # ========================================================
-    wick_ok = filter_wick(last, mode)
-    reasons["wick_ok"] = wick_ok
-    if wick_ok:
-        score += 2
-
-    # ========================================================
-    # MOMENTUM FILTER
-    # ========================================================
-    mom_ok = filter_momentum(last, mode)
-    reasons["momentum_ok"] = mom_ok
-    if mom_ok:
-        score += 2
+    if score == 0:
+        return 0, ScoreMeta(ema_gap=float(gap), volume_ratio=float(vol_ratio))
 
     # ========================================================
     # ATR COMPRESSION (MAIN ONLY)
     # ========================================================
     squeeze_ok = True
-    if mode == "main" and int(_get("ENABLE_ATR_COMPRESSION", 0)):
-        squeeze_ok = atr_compression(candles)
+    atr5_pct = atr20_pct = ratio = None
+    if mode == "main" and _ENABLE_ATR:
+        squeeze_ok, atr5_pct, atr20_pct, ratio = atr_compression(highs, lows, closes)
         if squeeze_ok:
             score += 2
-    reasons["atr_squeeze"] = squeeze_ok
 
-    # ========================================================
-    # BREAKOUT LEVEL (High/Low 20)
-    # ========================================================
-    breakout_ok = breakout_level(candles, 20)
-    reasons["breakout_highlow"] = breakout_ok
-    if breakout_ok:
-        score += 3
-
-    # ========================================================
-    # SPREAD FILTER
-    # ========================================================
-    spread_ok = spread <= th["spread_max"]
-    reasons["spread"] = spread
-    reasons["spread_ok"] = spread_ok
-    if spread_ok:
-        score += 1
-
-    return score, reasons
+    return int(score), ScoreMeta(
+        ema_gap=float(gap),
+        volume_ratio=float(vol_ratio),
+        wick_ok=bool(wick_ok),
+        momentum_ok=bool(mom_ok),
+        atr_squeeze=bool(squeeze_ok),
+        breakout_highlow=bool(breakout_ok),
+        spread=spread,
+        spread_ok=bool(spread_ok),
+        atr5_pct=atr5_pct,
+        atr20_pct=atr20_pct,
+        squeeze_ratio=ratio,
+    )
 
 
 # ============================================================
@@ -130,21 +164,19 @@ def score_signal(
 # ============================================================
 def check_signal(
     symbol: str,
-    candles: list[dict],
-    volumes: list[float],
+    candles: CandleBuffer,
     spread: float,
     mode: str = "early",
     market_regime: str = "NORMAL",   # NEW
     market_panic: bool = False,      # NEW
 ):
 
-    now = time.time()
-    th = pick_thresholds(mode)
+    now = time.monotonic_ns()
 
     # ========================================================
     # COOLDOWN
     # ========================================================
-    if now - _last_alert_time[mode] < th["cooldown"]:
+    if now - _last_alert_time_ns[mode] < _COOLDOWN_NS[mode]:
         return None
 
     if len(candles) < 30:
@@ -153,8 +185,7 @@ def check_signal(
     # ========================================================
     # DIRECTION
     # ========================================================
-    last = candles[-1]
-    direction = "LONG" if last["close"] > last["open"] else "SHORT"
+    direction = "LONG" if candles.closes[-1] > candles.opens[-1] else "SHORT"
 
     # ========================================================
     # REGIME HARD GATES (anti market crash)
@@ -178,18 +209,19 @@ def check_signal(
     if market_regime == "RANGE" and mode == "early":
         return None
 
+    # PANIC short bắt buộc breakout -> check O(1) trước khi chạy scorer
+    if market_regime == "PANIC" and mode == "main" and not breakout_level(candles):
+        return None
+
     # ========================================================
     # SCORE
     # ========================================================
-    score, meta = score_signal(symbol, candles, volumes, spread, mode)
+    score, meta = score_signal(symbol, candles, spread, mode)
 
     # ========================================================
     # THRESHOLD BY MODE (cũ)
     # ========================================================
-    base_early = int(_get("SCORE_MIN_EARLY", 6))
-    base_main = int(_get("SCORE_MIN_MAIN", 10))
-
-    min_score = base_early if mode == "early" else base_main
+    min_score = _SCORE_MIN_EARLY if mode == "early" else _SCORE_MIN_MAIN
 
     # ========================================================
     # REGIME SOFT GATES (tăng min_score)
@@ -207,12 +239,10 @@ def check_signal(
     if market_regime == "PANIC":
         # MAIN SHORT phải “cứng” hơn
         if mode == "main":
-            min_score = max(min_score, int(_get("SCORE_MIN_MAIN_PANIC", 13)))
+            min_score = max(min_score, _SCORE_MIN_MAIN_PANIC)
 
-            # panic short: bắt buộc có breakout + (nếu bật ATR squeeze) thì squeeze phải ok
-            if not meta.get("breakout_highlow", False):
-                return None
-            if int(_get("ENABLE_ATR_COMPRESSION", 0)) and (not meta.get("atr_squeeze", True)):
+            # panic short: breakout đã check trước SCORE; (nếu bật ATR squeeze) thì squeeze phải ok
+            if _ENABLE_ATR and (not meta.atr_squeeze):
                 return None
 
     if score < min_score:
@@ -221,10 +251,10 @@ def check_signal(
     # ========================================================
     # HIGH CONFIDENCE
     # ========================================================
-    high_conf = score >= int(_get("SCORE_HIGH_CONF", 14))
+    high_conf = score >= _SCORE_HIGH_CONF
 
     # Save cooldown timestamp
-    _last_alert_time[mode] = now
+    _last_alert_time_ns[mode] = now
 
     return {
         "symbol": symbol,
@@ -234,5 +264,5 @@ def check_signal(
         "high_conf": high_conf,
         "market_regime": market_regime,
         "market_panic": bool(market_panic),
-        **meta,
+        "meta": meta,
     }
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from app.config import CFG
-from app.market_regime import Regime
+from app.alert_engine import ScoreMeta
 from app.decision_engine import Decision
 
 
+_OK = "✅"
+_NO = "❌"
+
+
 def fmt_signal_message(
     symbol: str,
     mode: str,
@@ -12,64 +16,154 @@ def fmt_signal_message(
     price: float,
     score: int,
     high_conf: bool,
-    regime: Regime,
+    regime: str,
     decision: Decision,
-    meta: dict,
+    meta: ScoreMeta,
 ) -> str:
     tag = "🔥 HIGH CONF" if high_conf else ("🚨 MAIN" if mode == "main" else "🔔 EARLY")
 
-    lines: list[str] = []
-    lines.append(f"{tag} {direction} {symbol} @ {price:.4f}  (Score={score}/17)")
-    lines.append(f"REGIME: {regime} | gate={decision.risk_mult:.2f}x")
+    header = (
+        f"{tag} {direction} {symbol} @ {price:.4f}  (Score={score}/17)\n"
+        f"REGIME: {regime} | gate={decision.risk_mult:.2f}x"
+    )
 
     # Decision-support section (WHY)
+    why = ""
     if CFG.ALERT_MODE_DECISION:
-        lines.append("")
-        lines.append("WHY:")
-        gap = meta.get("ema_gap", 0.0) * 100
-        vol = meta.get("volume_ratio", 0.0)
-        spread = meta.get("spread", 0.0)
-        lines.append(f"• ema_gap={gap:.2f}%")
-        lines.append(f"• vol={vol:.2f}x")
-        lines.append(f"• spread={spread:.4f} {'✅' if meta.get('spread_ok') else '❌'}")
-        lines.append(f"• wick {'✅' if meta.get('wick_ok') else '❌'} | momentum {'✅' if meta.get('momentum_ok') else '❌'}")
-
+        why = (
+            f"\nWHY:\n"
+            f"• ema_gap={meta.ema_gap * 100:.2f}%\n"
+            f"• vol={meta.volume_ratio:.2f}x\n"
+            f"• spread={meta.spread:.4f} {_OK if meta.spread_ok else _NO}\n"
+            f"• wick {_OK if meta.wick_ok else _NO} | momentum {_OK if meta.momentum_ok else _NO}"
+        )
         if mode == "main":
-            lines.append(f"• ATR squeeze {'✅' if meta.get('atr_squeeze') else '❌'}")
-            lines.append(f"• BreakHigh20 {'✅' if meta.get('breakout_highlow') else '❌'}")
-            if meta.get("atr5_pct") is not None and meta.get("atr20_pct") is not None and meta.get("squeeze_ratio") is not None:
-                lines.append(
-                    f"  ATR5={meta['atr5_pct']*100:.2f}% | ATR20={meta['atr20_pct']*100:.2f}% | ratio={meta['squeeze_ratio']:.2f}"
+            why += (
+                f"\n• ATR squeeze {_OK if meta.atr_squeeze else _NO}"
+                f"\n• BreakHigh20 {_OK if meta.breakout_highlow else _NO}"
+            )
+            if meta.atr5_pct is not None and meta.atr20_pct is not None and meta.squeeze_ratio is not None:
+                why += (
+                    f"\n  ATR5={meta.atr5_pct*100:.2f}% | ATR20={meta.atr20_pct*100:.2f}% | ratio={meta.squeeze_ratio:.2f}"
                 )
 
     # Execution-ready section (plan gợi ý)
+    plan = ""
     if CFG.ALERT_MODE_EXECUTION:
-        lines.append("")
-        lines.append("PLAN (gợi ý):")
         # stop gợi ý theo ATR20% nếu có, fallback theo gap
+        stop_line = ""
         stop_note = "Use structure-based stop"
-        if meta.get("atr20_pct") is not None:
-            atr20_pct = float(meta["atr20_pct"])
-            stop_dist = price * (1.2 * atr20_pct)
-            if direction == "LONG":
-                stop = price - stop_dist
-            else:
-                stop = price + stop_dist
-            lines.append(f"• Stop (ATR-based): {stop:.4f} (~1.2*ATR20)")
+        if meta.atr20_pct is not None:
+            stop_dist = price * (1.2 * float(meta.atr20_pct))
+            stop = price - stop_dist if direction == "LONG" else price + stop_dist
+            stop_line = f"• Stop (ATR-based): {stop:.4f} (~1.2*ATR20)\n"
             stop_note = "ATR-based"
-        lines.append(f"• Risk: 0.25%–1.0% NAV × gate ({decision.risk_mult:.2f}x)")
-        lines.append(f"• Note: {stop_note} | tránh vào khi spread/wick xấu")
-
-    return "\n".join(lines)
-
-
-def fmt_regime_message(regime: Regime, reason: str) -> str:
-    if regime == Regime.PANIC:
-        return f"⛔ PANIC MODE ON\nreason: {reason}\nAction: BLOCK ALL new signals"
-    if regime == Regime.RECOVERY:
-        return f"⚠️ RECOVERY MODE\nreason: {reason}\nAction: block EARLY, MAIN selective (high_conf)"
-    if regime == Regime.RANGE:
-        return f"🟨 RANGE MODE\nreason: {reason}\nAction: block EARLY, MAIN selective"
-    if regime == Regime.TREND:
-        return f"🟩 TREND MODE\nreason: {reason}\nAction: MAIN prioritized"
-    return f"📌 REGIME → {regime}\nreason: {reason}"
+        plan = (
+            f"\nPLAN (gợi ý):\n"
+            f"{stop_line}"
+            f"• Risk: 0.25%–1.0% NAV × gate ({decision.risk_mult:.2f}x)\n"
+            f"• Note: {stop_note} | tránh vào khi spread/wick xấu"
+        )
+
+    return "\n".join(filter(None, (header, why, plan)))
+
+
+# regime là string của MarketRegimeEngine (NORMAL/TREND/RANGE/PANIC/RECOVERY)
+_REGIME_TMPL: dict[str, str] = {
+    "PANIC": "⛔ PANIC MODE ON\nreason: {r}\nAction: BLOCK ALL new signals",
+    "RECOVERY": "⚠️ RECOVERY MODE\nreason: {r}\nAction: block EARLY, MAIN selective (high_conf)",
+    "RANGE": "🟨 RANGE MODE\nreason: {r}\nAction: block EARLY, MAIN selective",
+    "TREND": "🟩 TREND MODE\nreason: {r}\nAction: MAIN prioritized",
+}
+_REGIME_TMPL_DEFAULT = "📌 REGIME → {reg}\nreason: {r}"
+
+
+def fmt_regime_message(regime: str, reason: str) -> str:
+    return _REGIME_TMPL.get(regime, _REGIME_TMPL_DEFAULT).format(r=reason, reg=regime)
+
+
+# ============================================================
+# SIM trade / status (template % dựng sẵn ở module scope)
+# ============================================================
+_TPL_OPEN = (
+    "🟢 OPEN %s %s\n"
+    "Entry: %.6f\n"
+    "Qty: %.4f\n"
+    "SL: %.6f\n"
+    "TP: %.6f\n"
+    "Risk: %.2f USDT | RR: %.2f\n"
+    "NAV: %.2f | DD: %.2f%%\n"
+    "liq≈%s$ | decision=%s | %s"
+)
+
+_TPL_CLOSE = (
+    "🔴 CLOSE %s\n"
+    "Exit: %.6f\n"
+    "Result: %s | PnL: %.2f USDT\n"
+    "NAV: %.2f | DD: %.2f%%\n"
+    "Trades: %d | W/L: %d/%d (%.1f%%)"
+)
+
+_TPL_STATUS = (
+    "📊 SIM STATUS\n"
+    "NAV: %.2f USDT | Peak: %.2f\n"
+    "DD: %.2f%% | Regime: %s | Panic: %s\n"
+    "Open positions: %d | Total risk: %.2f USDT\n\n"
+    "📈 Performance\n"
+    "Trades: %d | Wins: %d | Losses: %d\n"
+    "Winrate: %.2f%% | Total PnL: %.2f USDT"
+)
+
+
+def fmt_open_message(
+    symbol: str,
+    direction: str,
+    entry: float,
+    qty: float,
+    sl: float,
+    tp: float,
+    risk_usd: float,
+    rr: float,
+    nav: float,
+    dd_pct: float,
+    liq: float,
+    reason: str,
+    notes: str,
+) -> str:
+    return _TPL_OPEN % (
+        direction, symbol, entry, qty, sl, tp, risk_usd, rr, nav, dd_pct * 100, f"{liq:,.0f}", reason, notes,
+    )
+
+
+def fmt_close_message(symbol: str, close_info: dict, nav: float, dd_pct: float, stats: dict) -> str:
+    return _TPL_CLOSE % (
+        symbol,
+        float(close_info["exit"]),
+        close_info["result"],
+        float(close_info["pnl"]),
+        nav,
+        dd_pct * 100,
+        stats["total"],
+        stats["wins"],
+        stats["losses"],
+        stats["winrate"],
+    )
+
+
+def fmt_status_message(
+    stats: dict, peak_nav: float, dd_pct: float, regime: str, panic: bool, open_positions: int, total_risk: float
+) -> str:
+    return _TPL_STATUS % (
+        stats["nav"],
+        peak_nav,
+        dd_pct * 100,
+        regime,
+        panic,
+        open_positions,
+        total_risk,
+        stats["total"],
+        stats["wins"],
+        stats["losses"],
+        stats["winrate"],
+        stats["pnl"],
+    )
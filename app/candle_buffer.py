@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.indicators import RollingExtrema
+
+
+@dataclass
+class CandleBuffer:
+    """
+    Candle history dạng SoA (open/high/low/close/volume) trên ring buffer numpy.
+
+    Mỗi bar được ghi vào 2 vị trí (i và i+cap) nên `size` bar gần nhất luôn là
+    một slice liên tục -> `opens/highs/lows/closes/volumes` là view, không copy.
+
+    Rolling high/low (`lookback` bar trước bar cuối) và volume SMA (`vol_len`)
+    được cập nhật O(1) mỗi lần append.
+    """
+    cap: int = 400
+    lookback: int = 20
+    vol_len: int = 12
+    size: int = 0
+    _w: int = 0
+
+    vol_sum: float = 0.0
+    breakout_high: float = float("inf")
+    breakout_low: float = float("-inf")
+
+    _o: np.ndarray = field(init=False, repr=False)
+    _h: np.ndarray = field(init=False, repr=False)
+    _l: np.ndarray = field(init=False, repr=False)
+    _c: np.ndarray = field(init=False, repr=False)
+    _v: np.ndarray = field(init=False, repr=False)
+    _hi_roll: RollingExtrema = field(init=False, repr=False)
+    _lo_roll: RollingExtrema = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        n = 2 * int(self.cap)
+        self._o = np.zeros(n, dtype=np.float64)
+        self._h = np.zeros(n, dtype=np.float64)
+        self._l = np.zeros(n, dtype=np.float64)
+        self._c = np.zeros(n, dtype=np.float64)
+        self._v = np.zeros(n, dtype=np.float64)
+        self._hi_roll = RollingExtrema(self.lookback)
+        self._lo_roll = RollingExtrema(self.lookback)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, o: float, h: float, l: float, c: float, v: float) -> None:
+        # breakout level = extrema của `lookback` bar TRƯỚC bar mới
+        if len(self._hi_roll) == self.lookback:
+            self.breakout_high = self._hi_roll.max  # type: ignore[assignment]
+            self.breakout_low = self._lo_roll.min  # type: ignore[assignment]
+        self._hi_roll.push(h)
+        self._lo_roll.push(l)
+
+        i = self._w
+        j = i + self.cap
+
+        # running volume sum: trừ bar rơi khỏi cửa sổ vol_len
+        if self.size >= self.vol_len:
+            self.vol_sum -= self._v[j - self.vol_len]
+        self.vol_sum += v
+
+        self._o[i] = self._o[j] = o
+        self._h[i] = self._h[j] = h
+        self._l[i] = self._l[j] = l
+        self._c[i] = self._c[j] = c
+        self._v[i] = self._v[j] = v
+
+        self._w = (i + 1) % self.cap
+        if self.size < self.cap:
+            self.size += 1
+
+        # chống drift float của running sum
+        if self._w == 0:
+            self.vol_sum = float(self.volumes[-self.vol_len:].sum())
+
+    def _view(self, arr: np.ndarray) -> np.ndarray:
+        end = self._w + self.cap
+        return arr[end - self.size : end]
+
+    @property
+    def opens(self) -> np.ndarray:
+        return self._view(self._o)
+
+    @property
+    def highs(self) -> np.ndarray:
+        return self._view(self._h)
+
+    @property
+    def lows(self) -> np.ndarray:
+        return self._view(self._l)
+
+    @property
+    def closes(self) -> np.ndarray:
+        return self._view(self._c)
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return self._view(self._v)
+
+    @property
+    def vol_avg(self) -> float | None:
+        if self.size < self.vol_len:
+            return None
+        return self.vol_sum / self.vol_len
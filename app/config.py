@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from typing import NamedTuple
 
 # Auto-load .env if python-dotenv exists
 try:
@@ -36,8 +36,7 @@ def _f(key: str, default: float) -> float:
     return float(v) if v is not None else float(default)
 
 
-@dataclass(frozen=True)
-class Config:
+class Config(NamedTuple):
     # Required core
     BINANCE_FUTURES_WS: str = _req("BINANCE_FUTURES_WS")
     TELEGRAM_BOT_TOKEN: str = _req("TELEGRAM_BOT_TOKEN")
@@ -46,6 +45,8 @@ class Config:
     # Runtime
     DEBUG_ENABLED: int = _i("DEBUG_ENABLED", 0)
     HEARTBEAT_SEC: int = _i("HEARTBEAT_SEC", 300)
+    TG_DEBOUNCE_SEC: float = _f("TG_DEBOUNCE_SEC", 0.3)       # gom burst Telegram (0 = tắt)
+    SYMBOL_QUEUE_SIZE: int = _i("SYMBOL_QUEUE_SIZE", 2048)     # tick queue / symbol worker
 
     # EMA
     EMA_FAST: int = _i("EMA_FAST", 9)
@@ -86,6 +87,12 @@ class Config:
     MOMENTUM_MIN_EARLY: float = _f("MOMENTUM_MIN_EARLY", 0.003)
     MOMENTUM_MIN_MAIN: float = _f("MOMENTUM_MIN_MAIN", 0.007)
 
+    # Score gates
+    SCORE_MIN_EARLY: int = _i("SCORE_MIN_EARLY", 6)
+    SCORE_MIN_MAIN: int = _i("SCORE_MIN_MAIN", 10)
+    SCORE_MIN_MAIN_PANIC: int = _i("SCORE_MIN_MAIN_PANIC", 13)
+    SCORE_HIGH_CONF: int = _i("SCORE_HIGH_CONF", 14)
+
     # ATR compression
     ENABLE_ATR_COMPRESSION: int = _i("ENABLE_ATR_COMPRESSION", 1)
     ATR_SHORT: int = _i("ATR_SHORT", 5)
@@ -104,10 +111,24 @@ class Config:
     TREND_EMA_GAP_4H: float = _f("TREND_EMA_GAP_4H", 0.0025)
     RANGE_ATR_RATIO_MAX: float = _f("RANGE_ATR_RATIO_MAX", 0.70)
 
+    PANIC_ATR_RATIO: float = _f("PANIC_ATR_RATIO", 1.6)          # ATR5/ATR20 (1H)
+    PANIC_DROP_PCT: float = _f("PANIC_DROP_PCT", 0.03)
+    RECOVERY_ATR_RATIO: float = _f("RECOVERY_ATR_RATIO", 1.15)
+
+    TREND_EMA_FAST: int = _i("TREND_EMA_FAST", 20)
+    TREND_EMA_SLOW: int = _i("TREND_EMA_SLOW", 50)
+    TREND_GAP_MIN: float = _f("TREND_GAP_MIN", 0.0015)           # gap 4H
+    RANGE_ATR_MAX: float = _f("RANGE_ATR_MAX", 0.006)            # ATR% 4H
+    RANGE_GAP_MAX: float = _f("RANGE_GAP_MAX", 0.0010)
+
     REGIME_MIN_HOLD_SEC: int = _i("REGIME_MIN_HOLD_SEC", 1800)
     REGIME_ALERT_COOLDOWN_SEC: int = _i("REGIME_ALERT_COOLDOWN_SEC", 900)
     REGIME_NOTIFY: int = _i("REGIME_NOTIFY", 1)
 
+    # Alert sections
+    ALERT_MODE_DECISION: int = _i("ALERT_MODE_DECISION", 1)
+    ALERT_MODE_EXECUTION: int = _i("ALERT_MODE_EXECUTION", 1)
+
     # Portfolio / risk
     NAV_USD: float = _f("NAV_USD", 10000.0)
     MAX_POSITIONS: int = _i("MAX_POSITIONS", 8)
@@ -1,27 +1,38 @@
 from __future__ import annotations
 
 import numpy as np
-from typing import List
+from typing import Optional, Sequence
 
 
-def returns_from_prices(prices: List[float]) -> np.ndarray:
-    if len(prices) < 2:
+def returns_from_prices(
+    prices: Sequence[float] | np.ndarray,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Simple returns p[i]/p[i-1] - 1, ghi thẳng vào `out` nếu có (không tạo mảng trung gian).
+    """
+    arr = np.asarray(prices, dtype=np.float64)
+    n = arr.shape[0] - 1
+    if n < 1:
         return np.array([])
 
-    arr = np.array(prices)
-    return np.diff(arr) / arr[:-1]
+    out = np.empty(n, dtype=np.float64) if out is None else out[:n]
+    np.subtract(arr[1:], arr[:-1], out=out)
+    np.divide(out, arr[:-1], out=out)
+    return out
 
 
 def correlation(
-    prices_a: List[float],
-    prices_b: List[float],
+    prices_a: Sequence[float] | np.ndarray,
+    prices_b: Sequence[float] | np.ndarray,
 ) -> float:
     """
     Compute Pearson correlation between two return series.
     """
 
-    ret_a = returns_from_prices(prices_a)
-    ret_b = returns_from_prices(prices_b)
+    buf = np.empty((2, max(len(prices_a), len(prices_b), 1)), dtype=np.float64)
+    ret_a = returns_from_prices(prices_a, buf[0])
+    ret_b = returns_from_prices(prices_b, buf[1])
 
     if len(ret_a) < 5 or len(ret_b) < 5:
         return 0.0
@@ -31,4 +42,11 @@ def correlation(
     ret_a = ret_a[-min_len:]
     ret_b = ret_b[-min_len:]
 
-    return float(np.corrcoef(ret_a, ret_b)[0, 1])
\ No newline at end of file
+    # scalar Pearson (không dựng ma trận 2x2 như np.corrcoef)
+    da = ret_a - ret_a.mean()
+    db = ret_b - ret_b.mean()
+    denom = np.sqrt(np.dot(da, da) * np.dot(db, db))
+    if denom == 0:
+        return 0.0
+    return float(np.dot(da, db) / denom)
+
@@ -3,8 +3,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
 
+from app._njit import njit
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Decision:
     allow: bool
     risk_mult: float
@@ -13,88 +15,172 @@ class Decision:
     reason: str
 
 
-def decide_trade(
-    *,
-    market_regime: str,
-    market_panic: bool,
-    mode: str,
-    direction: str,
-    score: int,
-    high_conf: bool,
-    base_rr: float,
-    base_sl_atr_mult: float,
-) -> Decision:
+_MODE_EARLY = 0
+_MODE_MAIN = 1
+_MODE_ID = {"early": _MODE_EARLY, "main": _MODE_MAIN}
+
+_R_NORMAL = 0
+_R_TREND = 1
+_R_RANGE = 2
+_R_RECOVERY = 3
+_REGIME_ID = {"NORMAL": _R_NORMAL, "TREND": _R_TREND, "RANGE": _R_RANGE, "RECOVERY": _R_RECOVERY}
+
+
+# reason codes trả về từ kernel -> string ở wrapper
+_RC_ALLOW = 0
+_RC_EARLY_LOW = 1
+_RC_EARLY_ALLOW = 2
+_RC_TREND_WEAK = 3
+_RC_RANGE_LOW = 4
+_RC_RECOVERY_STRICT = 5
+_RC_PANIC_LONG = 6
+_RC_PANIC_SHORT = 7
+
+_REASONS = (
+    "",  # _RC_ALLOW -> _ALLOW_REASON[regime]
+    "EARLY: score too low",
+    "EARLY: allow (reduced risk)",
+    "TREND: MAIN not strong enough",
+    "RANGE: MAIN score too low",
+    "RECOVERY: require high_conf & strong score",
+    "PANIC: block LONG",
+    "PANIC: allow SHORT (reduced risk)",
+)
+_ALLOW_REASON = {r: f"{r}: allow" for r in ("NORMAL", "TREND", "RANGE", "RECOVERY", "PANIC")}
+
+
+# -------------------------
+# MAIN per-regime adjustments: (rr, risk_mult, slm, score, high_conf) -> (rr, risk_mult, slm, ok)
+# -------------------------
+@njit(cache=True)
+def _apply_trend(rr, risk_mult, slm, score, high_conf):
+    rr = max(rr, 2.2)
+    risk_mult *= 1.10
+    slm *= 1.10
+    return rr, risk_mult, slm, not (score < 10 and not high_conf)
+
+
+@njit(cache=True)
+def _apply_range(rr, risk_mult, slm, score, high_conf):
+    rr = min(rr, 1.6)
+    risk_mult *= 0.75
+    slm *= 0.90
+    return rr, risk_mult, slm, score >= 12
+
+
+@njit(cache=True)
+def _apply_recovery(rr, risk_mult, slm, score, high_conf):
+    rr = min(rr, 1.7)
+    risk_mult *= 0.55
+    slm *= 0.95
+    return rr, risk_mult, slm, score >= 12 and high_conf
+
+
+@njit(cache=True)
+def _apply_normal(rr, risk_mult, slm, score, high_conf):
+    # NORMAL (default)
+    rr = max(rr, 1.8)
+    risk_mult *= (1.0 if high_conf else 0.90)
+    return rr, risk_mult, slm, True
+
+
+@njit(cache=True)
+def _decide_kernel(regime_id, panic, mode_id, is_long, score, high_conf, base_rr, base_slm):
     """
-    Centralized decision policy:
-    - block/allow
-    - adjust risk multiplier
-    - choose RR + SL(ATR mult)
+    Policy tree trên input đã integer hoá.
+    returns (allow, risk_mult, rr, sl_atr_mult, reason_code)
     """
-
-    regime = (market_regime or "NORMAL").upper()
-
     # -------------------------
     # PANIC policy
     # -------------------------
-    if market_panic:
-        if direction.upper() == "LONG":
-            return Decision(False, 0.0, base_rr, base_sl_atr_mult, "PANIC: block LONG")
+    if panic:
+        if is_long:
+            return False, 0.0, base_rr, base_slm, _RC_PANIC_LONG
         # allow SHORT but reduce risk and RR a bit
-        rr = min(base_rr, 1.8)
-        slm = base_sl_atr_mult * 1.05
-        return Decision(True, 0.60, rr, slm, "PANIC: allow SHORT (reduced risk)")
+        return True, 0.60, min(base_rr, 1.8), base_slm * 1.05, _RC_PANIC_SHORT
 
     # -------------------------
-    # Mode-specific policy
-    # -------------------------
+    # EARLY: conservative, allowed but smaller size
     # If later bạn muốn block EARLY trong RANGE/RECOVERY thì xử lý ở đây
-    if mode.lower() == "early":
-        # conservative for early signals
+    # -------------------------
+    if mode_id == _MODE_EARLY:
         if score < 7 and not high_conf:
-            return Decision(False, 0.0, base_rr, base_sl_atr_mult, "EARLY: score too low")
-        # early allowed but smaller size
-        rr = max(1.6, base_rr)
-        return Decision(True, 0.75, rr, base_sl_atr_mult, "EARLY: allow (reduced risk)")
+            return False, 0.0, base_rr, base_slm, _RC_EARLY_LOW
+        return True, 0.75, max(1.6, base_rr), base_slm, _RC_EARLY_ALLOW
 
     # -------------------------
-    # MAIN policy by regime
+    # MAIN
     # -------------------------
     risk_mult = 1.0
-    rr = float(base_rr)
-    slm = float(base_sl_atr_mult)
-
+    rr = base_rr
+    slm = base_slm
     if high_conf:
         rr = max(rr, 2.5)
         risk_mult *= 1.20
         slm *= 1.05
 
-    if regime == "TREND":
-        rr = max(rr, 2.2)
-        risk_mult *= 1.10
-        slm *= 1.10
-        if score < 10 and not high_conf:
-            return Decision(False, 0.0, rr, slm, "TREND: MAIN not strong enough")
-
-    elif regime == "RANGE":
-        rr = min(rr, 1.6)
-        risk_mult *= 0.75
-        slm *= 0.90
-        if score < 12:
-            return Decision(False, 0.0, rr, slm, "RANGE: MAIN score too low")
-
-    elif regime == "RECOVERY":
-        rr = min(rr, 1.7)
-        risk_mult *= 0.55
-        slm *= 0.95
-        if score < 12 or not high_conf:
-            return Decision(False, 0.0, rr, slm, "RECOVERY: require high_conf & strong score")
+    # regime_id -> (apply fn, reason code khi bị chặn); int compare -> LLVM switch
+    if regime_id == _R_TREND:
+        rr, risk_mult, slm, ok = _apply_trend(rr, risk_mult, slm, score, high_conf)
+        rc_block = _RC_TREND_WEAK
+    elif regime_id == _R_RANGE:
+        rr, risk_mult, slm, ok = _apply_range(rr, risk_mult, slm, score, high_conf)
+        rc_block = _RC_RANGE_LOW
+    elif regime_id == _R_RECOVERY:
+        rr, risk_mult, slm, ok = _apply_recovery(rr, risk_mult, slm, score, high_conf)
+        rc_block = _RC_RECOVERY_STRICT
+    else:
+        rr, risk_mult, slm, ok = _apply_normal(rr, risk_mult, slm, score, high_conf)
+        rc_block = _RC_ALLOW
+    if not ok:
+        return False, 0.0, rr, slm, rc_block
+
+    # clamp (ternary: không qua min/max builtin khi chạy bản Python fallback)
+    rr = 3.0 if rr > 3.0 else (1.2 if rr < 1.2 else rr)
+    slm = 2.8 if slm > 2.8 else (0.8 if slm < 0.8 else slm)
+    return True, risk_mult, rr, slm, _RC_ALLOW
 
+
+def decide_trade(
+    *,
+    market_regime: str,
+    market_panic: bool,
+    mode: str,
+    direction: str,
+    score: int,
+    high_conf: bool,
+    base_rr: float,
+    base_sl_atr_mult: float,
+) -> Decision:
+    """
+    Centralized decision policy:
+    - block/allow
+    - adjust risk multiplier
+    - choose RR + SL(ATR mult)
+    """
+
+    regime = (market_regime or "NORMAL").upper()
+
+    # unknown regime -> NORMAL, unknown mode -> MAIN
+    allow, risk_mult, rr, slm, rc = _decide_kernel(
+        _REGIME_ID.get(regime, _R_NORMAL),
+        bool(market_panic),
+        _MODE_ID.get(mode.lower(), _MODE_MAIN),
+        direction.upper() == "LONG",
+        int(score),
+        bool(high_conf),
+        float(base_rr),
+        float(base_sl_atr_mult),
+    )
+    if rc == _RC_ALLOW:
+        reason = _ALLOW_REASON.get(regime) or f"{regime}: allow"
     else:
-        # NORMAL (default)
-        rr = max(rr, 1.8)
-        risk_mult *= (1.0 if high_conf else 0.90)
+        reason = _REASONS[rc]
+    return Decision(bool(allow), float(risk_mult), float(rr), float(slm), reason)
 
-    rr = max(1.2, min(3.0, rr))
-    slm = max(0.8, min(2.8, slm))
 
-    return Decision(True, risk_mult, rr, slm, f"{regime}: allow")
+def warmup() -> None:
+    """
+    JIT compile _decide_kernel trước signal đầu tiên.
+    """
+    _decide_kernel(_R_NORMAL, False, _MODE_MAIN, True, 0, False, 2.0, 1.5)
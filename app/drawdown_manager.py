@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class DrawdownState:
     peak_nav: float
     nav: float
@@ -16,6 +16,13 @@ class DrawdownState:
     halted_until: float
 
 
+class DrawdownSnapshot(NamedTuple):
+    can_trade: bool
+    reason: str
+    risk_mult: float
+    state: DrawdownState
+
+
 class DrawdownManager:
     """
     Track portfolio drawdown and decide if we should reduce risk or stop trading.
@@ -84,33 +91,42 @@ class DrawdownManager:
             halted_until=halted_until,
         )
 
-    def can_trade(self) -> Tuple[bool, str]:
-        st = self.update(self.nav)
-        now = time.time()
-
-        if st.kill:
-            return False, "dd_kill"
-        if now < st.halted_until:
-            return False, "dd_hard_cooldown"
-        return True, "ok"
-
-    def risk_multiplier(self) -> float:
+    def _calc_risk_mult(self, dd_pct: float) -> float:
         """
         Gradually reduce risk as drawdown increases (after soft).
         """
-        st = self.update(self.nav)
-
-        if st.dd_pct < self.dd_soft_pct:
+        if dd_pct < self.dd_soft_pct:
             return 1.0
 
         # map dd from [soft..hard] -> [1.0 .. min_risk_mult]
         soft = self.dd_soft_pct
         hard = max(self.dd_hard_pct, soft + 1e-9)
-        x = min(1.0, max(0.0, (st.dd_pct - soft) / (hard - soft)))
+        x = min(1.0, max(0.0, (dd_pct - soft) / (hard - soft)))
         mult = 1.0 - x * (1.0 - self.min_risk_mult)
 
         return max(self.min_risk_mult, min(1.0, mult))
 
+    def snapshot(self) -> DrawdownSnapshot:
+        """
+        can_trade + reason + risk_mult + state trong 1 lần update.
+        """
+        st = self.update(self.nav)
+        risk_mult = self._calc_risk_mult(st.dd_pct)
+
+        if st.kill:
+            return DrawdownSnapshot(False, "dd_kill", risk_mult, st)
+        if time.time() < st.halted_until:
+            return DrawdownSnapshot(False, "dd_hard_cooldown", risk_mult, st)
+        return DrawdownSnapshot(True, "ok", risk_mult, st)
+
+    def can_trade(self) -> Tuple[bool, str]:
+        snap = self.snapshot()
+        return snap.can_trade, snap.reason
+
+    def risk_multiplier(self) -> float:
+        st = self.update(self.nav)
+        return self._calc_risk_mult(st.dd_pct)
+
     def state(self) -> DrawdownState:
         return self.update(self.nav)
 
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import Optional, Protocol
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OrderIntent:
     symbol: str
     direction: str      # LONG/SHORT
@@ -16,7 +16,7 @@ class OrderIntent:
     reason: str         # optional note
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OrderResult:
     ok: bool
     order_id: Optional[str]
@@ -1,45 +1,43 @@
 from __future__ import annotations
 
-from app.config import CFG
-from app.indicators import wick_ratio, momentum, ATR
-
-
-def pick_thresholds(mode: str) -> dict:
-    if mode == "early":
-        return {
-            "ema_gap": CFG.REGIME_EMA_GAP_EARLY,
-            "vol_ratio": CFG.VOLUME_RATIO_EARLY,
-            "wick_max": CFG.WICK_MAX_RATIO_EARLY,
-            "mom_min": CFG.MOMENTUM_MIN_EARLY,
-            "spread_max": CFG.SPREAD_MAX_EARLY,
-            "cooldown": CFG.COOLDOWN_SEC_EARLY,
-        }
-
-    return {
-        "ema_gap": CFG.REGIME_EMA_GAP_MAIN,
-        "vol_ratio": CFG.VOLUME_RATIO_MAIN,
-        "wick_max": CFG.WICK_MAX_RATIO_MAIN,
-        "mom_min": CFG.MOMENTUM_MIN_MAIN,
-        "spread_max": CFG.SPREAD_MAX_MAIN,
-        "cooldown": CFG.COOLDOWN_SEC_MAIN,
-    }
-
-
-def filter_wick(candle: dict, mode: str) -> bool:
-    if not CFG.ENABLE_WICK_FILTER:
-        return True
-    th = pick_thresholds(mode)
-    return wick_ratio(candle) <= th["wick_max"]
+from types import MappingProxyType
+from typing import Mapping
 
+import numpy as np
 
-def filter_momentum(candle: dict, mode: str) -> bool:
-    if not CFG.ENABLE_MOMENTUM:
-        return True
-    th = pick_thresholds(mode)
-    return momentum(candle) >= th["mom_min"]
-
-
-def atr_compression(candles: list[dict]) -> tuple[bool, float | None, float | None, float | None]:
+from app.config import CFG
+from app.indicators import wilder_atr
+
+
+# CFG frozen lúc import -> build threshold 1 lần, read-only để caller không sửa chung
+_TH_EARLY = MappingProxyType({
+    "ema_gap": CFG.REGIME_EMA_GAP_EARLY,
+    "vol_ratio": CFG.VOLUME_RATIO_EARLY,
+    "wick_max": CFG.WICK_MAX_RATIO_EARLY,
+    "mom_min": CFG.MOMENTUM_MIN_EARLY,
+    "spread_max": CFG.SPREAD_MAX_EARLY,
+    "cooldown": CFG.COOLDOWN_SEC_EARLY,
+})
+
+_TH_MAIN = MappingProxyType({
+    "ema_gap": CFG.REGIME_EMA_GAP_MAIN,
+    "vol_ratio": CFG.VOLUME_RATIO_MAIN,
+    "wick_max": CFG.WICK_MAX_RATIO_MAIN,
+    "mom_min": CFG.MOMENTUM_MIN_MAIN,
+    "spread_max": CFG.SPREAD_MAX_MAIN,
+    "cooldown": CFG.COOLDOWN_SEC_MAIN,
+})
+
+
+def pick_thresholds(mode: str) -> Mapping[str, float]:
+    return _TH_EARLY if mode == "early" else _TH_MAIN
+
+
+def atr_compression(
+    highs: np.ndarray,
+    lows: np.ndarray,
+    closes: np.ndarray,
+) -> tuple[bool, float | None, float | None, float | None]:
     """
     returns (ok, atr_short_pct, atr_long_pct, squeeze_ratio)
     ATR values are returned as % of close for readability.
@@ -47,18 +45,13 @@ def atr_compression(candles: list[dict]) -> tuple[bool, float | None, float | No
     if not CFG.ENABLE_ATR_COMPRESSION:
         return True, None, None, None
 
-    if len(candles) < CFG.ATR_LONG + 2:
+    n = CFG.ATR_LONG + 2
+    if len(closes) < n:
         return False, None, None, None
 
-    atr_s = ATR(CFG.ATR_SHORT)
-    atr_l = ATR(CFG.ATR_LONG)
-
-    a_s = a_l = None
-    last_close = float(candles[-1]["close"])
-
-    for c in candles[-(CFG.ATR_LONG + 2):]:
-        a_s = atr_s.update(float(c["high"]), float(c["low"]), float(c["close"]))
-        a_l = atr_l.update(float(c["high"]), float(c["low"]), float(c["close"]))
+    last_close = float(closes[-1])
+    a_s = wilder_atr(highs[-n:], lows[-n:], closes[-n:], CFG.ATR_SHORT)
+    a_l = wilder_atr(highs[-n:], lows[-n:], closes[-n:], CFG.ATR_LONG)
 
     if a_s is None or a_l is None or a_l == 0 or last_close == 0:
         return False, None, None, None
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 from collections import deque
 
+import numpy as np
+
+from app._njit import njit
+
 __all__ = [
     "EMA",
     "ATR",
-    "wick_ratio",
-    "momentum",
+    "wilder_atr",
+    "RollingExtrema",
 ]
 
 
@@ -15,12 +19,16 @@ class EMA:
         self.period = period
         self.mult = 2.0 / (period + 1.0)
         self.value: float | None = None
+        # tick đầu seed value rồi rebind sang bản hot (không còn nhánh None mỗi tick)
+        self.update = self._first
 
-    def update(self, price: float) -> float | None:
-        if self.value is None:
-            self.value = price
-        else:
-            self.value = (price - self.value) * self.mult + self.value
+    def _first(self, price: float) -> float:
+        self.value = price
+        self.update = self._hot
+        return price
+
+    def _hot(self, price: float) -> float:
+        self.value = (price - self.value) * self.mult + self.value  # type: ignore[operator]
         return self.value
 
 
@@ -30,6 +38,9 @@ class ATR:
     """
     def __init__(self, period: int):
         self.period = period
+        # Wilder: value = value*(p-1)/p + tr/p -> hằng số tính 1 lần, không chia mỗi tick
+        self._a = (period - 1) / period
+        self._b = 1.0 / period
         self.value: float | None = None
         self.prev_close: float | None = None
         self._warm = 0
@@ -51,34 +62,96 @@ class ATR:
             return self.value
 
         # Wilder smoothing
-        self.value = (self.value * (self.period - 1) + tr) / self.period  # type: ignore[operator]
+        self.value = self.value * self._a + tr * self._b  # type: ignore[operator]
         return self.value
 
 
-def wick_ratio(c: dict) -> float:
+@njit(cache=True)
+def _wilder_atr_kernel(h, l, c, period):
     """
-    Total wick / range
+    Wilder ATR của bar cuối: seed = mean TR của `period` bar đầu rồi Wilder smoothing.
+    Cùng thứ tự phép tính với ATR.update. NaN nếu chưa đủ bar.
     """
-    o = float(c["open"])
-    h = float(c["high"])
-    l = float(c["low"])
-    cl = float(c["close"])
-
-    rng = max(h - l, 1e-12)
-    body_top = max(o, cl)
-    body_bot = min(o, cl)
-
-    upper = max(0.0, h - body_top)
-    lower = max(0.0, body_bot - l)
-    return (upper + lower) / rng
+    n = c.shape[0]
+    if n < period:
+        return np.nan
+
+    sum_tr = 0.0
+    prev = 0.0
+    for i in range(period):
+        tr = h[i] - l[i]
+        if i > 0:
+            tr = max(tr, abs(h[i] - prev), abs(l[i] - prev))
+        sum_tr += tr
+        prev = c[i]
+
+    value = sum_tr / period
+    a = (period - 1) / period
+    b = 1.0 / period
+    for i in range(period, n):
+        tr = max(h[i] - l[i], abs(h[i] - prev), abs(l[i] - prev))
+        value = value * a + tr * b
+        prev = c[i]
+    return value
+
+
+# AOT build (python -m app._kernels_build) nếu có, fallback JIT
+try:
+    from app.indicators_aot import wilder_atr as _aot_wilder_atr  # type: ignore
+except ImportError:
+    _aot_wilder_atr = None
+
+_wilder_atr_impl = _aot_wilder_atr or _wilder_atr_kernel
+
+
+def wilder_atr(highs, lows, closes, period: int) -> float | None:
+    """
+    Wilder ATR của bar cuối, tính 1 lần trên mảng (cùng kết quả với ATR.update chạy hết chuỗi).
+    None nếu chưa đủ `period` bar.
+    """
+    v = _wilder_atr_impl(
+        np.asarray(highs, dtype=np.float64),
+        np.asarray(lows, dtype=np.float64),
+        np.asarray(closes, dtype=np.float64),
+        int(period),
+    )
+    return None if v != v else float(v)
 
 
-def momentum(c: dict) -> float:
+class RollingExtrema:
     """
-    |close-open| / open
+    Rolling max/min O(1) amortized (monotonic deque)
     """
-    o = float(c["open"])
-    cl = float(c["close"])
-    if o == 0:
-        return 0.0
-    return abs(cl - o) / o
+    def __init__(self, window: int):
+        self.window = window
+        self._n = 0
+        self._max: deque[tuple[float, int]] = deque()
+        self._min: deque[tuple[float, int]] = deque()
+
+    def __len__(self) -> int:
+        return min(self._n, self.window)
+
+    def push(self, value: float) -> None:
+        i = self._n
+        while self._max and self._max[-1][0] <= value:
+            self._max.pop()
+        self._max.append((value, i))
+        while self._min and self._min[-1][0] >= value:
+            self._min.pop()
+        self._min.append((value, i))
+
+        expired = i - self.window
+        if self._max[0][1] <= expired:
+            self._max.popleft()
+        if self._min[0][1] <= expired:
+            self._min.popleft()
+        self._n = i + 1
+
+    @property
+    def max(self) -> float | None:
+        return self._max[0][0] if self._max else None
+
+    @property
+    def min(self) -> float | None:
+        return self._min[0][0] if self._min else None
+
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import aiohttp
 
 from app.config import CFG
-from app.telegram import send_telegram
-from app.resample import TimeframeResampler
+from app.telegram import tg_send, tg_worker
+from app.alert_formatter import (
+    fmt_close_message,
+    fmt_open_message,
+    fmt_regime_message,
+    fmt_status_message,
+)
+from app.resample import Candle, TimeframeResampler
 from app.alert_engine import check_signal
+from app.candle_buffer import CandleBuffer
 from app.symbols import FALLBACK_SYMBOLS
 from app.utils import backoff_s
+from app.ws_frames import decode_aggtrade, decode_bookticker
 
 from app.market_regime import MarketRegimeEngine
 from app.risk_engine import build_risk_plan, RiskPlan
@@ -21,7 +28,9 @@ from app.position_manager import PositionManager
 from app.drawdown_manager import DrawdownManager
 from app.indicators import ATR
 
-from app.decision_engine import decide_trade
+from app.decision_engine import decide_trade, warmup as warmup_decide
+from app._kernels import warmup as warmup_kernels
+from app._njit import njit
 
 
 # ============================================================
@@ -31,6 +40,8 @@ MRE = MarketRegimeEngine()
 MARKET_REGIME = "NORMAL"
 MARKET_PANIC = False
 LAST_REGIME: Optional[str] = None
+REGIME_NOTIFY = bool(int(getattr(CFG, "REGIME_NOTIFY", 1)))
+REGIME_PROXIES = ("BTCUSDT", "ETHUSDT")
 
 
 # ============================================================
@@ -39,12 +50,23 @@ LAST_REGIME: Optional[str] = None
 SIM_ENABLED = bool(int(getattr(CFG, "SIM_ENABLED", 1)))
 SIM_START_NAV = float(getattr(CFG, "SIM_START_NAV", 10000.0))
 SIM_RR = float(getattr(CFG, "SIM_RR", 2.0))
+ATR_PERIOD = int(getattr(CFG, "ATR_SHORT", 5))
+SYMBOL_QUEUE_SIZE = int(CFG.SYMBOL_QUEUE_SIZE)
+
+# đọc CFG 1 lần lúc import (không getattr trong hot loop)
+COOLDOWN_SEC_MAIN = int(getattr(CFG, "COOLDOWN_SEC_MAIN", 900))
+MIN_LIQUIDITY_USD = float(getattr(CFG, "MIN_LIQUIDITY_USD", 5_000_000.0))
+SL_ATR_MULT = float(getattr(CFG, "SL_ATR_MULT", 1.5))
+TARGET_VOL_PCT = float(getattr(CFG, "TARGET_VOL_PCT", 0.015))
+ENTRY_MODE = str(getattr(CFG, "ENTRY_MODE", "adaptive")).lower()
+ENTRY_PULLBACK_PCT = float(getattr(CFG, "ENTRY_PULLBACK_PCT", 0.003))
+ENTRY_BREAKOUT_PCT = float(getattr(CFG, "ENTRY_BREAKOUT_PCT", 0.0015))
 
 
 # ============================================================
 # SIM EXECUTION (Paper trading)
 # ============================================================
-@dataclass
+@dataclass(slots=True)
 class SimPosition:
     symbol: str
     direction: str  # "LONG" | "SHORT"
@@ -57,6 +79,26 @@ class SimPosition:
     rr: float
 
 
+_HIT_NONE = 0
+_HIT_SL = 1
+_HIT_TP = 2
+
+
+@njit(cache=True)
+def _sl_tp_kernel(sign, sl, tp, high, low, risk_usd, rr):
+    """
+    SL/TP check 1 nến. sign=+1 LONG / -1 SHORT -> 1 công thức cho cả 2 phía
+    (SL ưu tiên trước TP nếu cùng nến chạm cả hai). Trả (hit, exit_price, pnl).
+    """
+    adverse = low if sign > 0.0 else high
+    favorable = high if sign > 0.0 else low
+    if sign * (adverse - sl) <= 0.0:
+        return _HIT_SL, sl, -risk_usd
+    if sign * (favorable - tp) >= 0.0:
+        return _HIT_TP, tp, risk_usd * rr
+    return _HIT_NONE, 0.0, 0.0
+
+
 class ExecutionSimulator:
     def __init__(self, nav_usd: float, slippage_pct: float = 0.0):
         self.nav = float(nav_usd)
@@ -94,31 +136,18 @@ class ExecutionSimulator:
     def close(self, symbol: str) -> Optional[SimPosition]:
         return self.positions.pop(symbol, None)
 
-    def update_by_candle(self, symbol: str, candle: dict) -> Optional[dict]:
+    def update_by_candle(self, symbol: str, candle: Candle) -> Optional[dict]:
         pos = self.positions.get(symbol)
         if not pos:
             return None
 
-        high = float(candle["high"])
-        low = float(candle["low"])
-
-        result: Optional[str] = None
-        exit_price: Optional[float] = None
-        pnl = 0.0
-
-        if pos.direction == "LONG":
-            if low <= pos.sl:
-                result, exit_price, pnl = "SL", pos.sl, -pos.risk_usd
-            elif high >= pos.tp:
-                result, exit_price, pnl = "TP", pos.tp, pos.risk_usd * pos.rr
-        else:
-            if high >= pos.sl:
-                result, exit_price, pnl = "SL", pos.sl, -pos.risk_usd
-            elif low <= pos.tp:
-                result, exit_price, pnl = "TP", pos.tp, pos.risk_usd * pos.rr
-
-        if not result:
+        hit, exit_price, pnl = _sl_tp_kernel(
+            1.0 if pos.direction == "LONG" else -1.0,
+            pos.sl, pos.tp, candle.high, candle.low, pos.risk_usd, pos.rr,
+        )
+        if hit == _HIT_NONE:
             return None
+        result = "SL" if hit == _HIT_SL else "TP"
 
         exit_filled = self._apply_slippage_exit(pos.direction, float(exit_price))
         self.nav += pnl
@@ -178,6 +207,8 @@ ddm.update(sim.nav)
 # SYMBOL STATE
 # ============================================================
 class SymbolState:
+    __slots__ = ("bid", "ask", "cur_sec", "vol_bucket", "r_main", "candles", "atr", "last_main")
+
     def __init__(self):
         self.bid = None
         self.ask = None
@@ -185,8 +216,9 @@ class SymbolState:
         self.vol_bucket = 0.0
 
         self.r_main = TimeframeResampler(15 * 60)
-        self.candles: List[dict] = []
-        self.volumes: List[float] = []
+        self.candles = CandleBuffer(cap=400, lookback=20, vol_len=CFG.VOLUME_SMA_LEN)
+        # Wilder ATR streaming: update 1 lần mỗi nến MAIN đóng
+        self.atr = ATR(ATR_PERIOD)
         self.last_main = 0
 
     def mid(self) -> Optional[float]:
@@ -202,41 +234,31 @@ class SymbolState:
 
 
 class ProxyState:
+    __slots__ = ("r1h", "r4h", "candles_1h", "candles_4h")
+
     def __init__(self):
         self.r1h = TimeframeResampler(60 * 60)
         self.r4h = TimeframeResampler(4 * 60 * 60)
-        self.candles_1h: List[dict] = []
-        self.candles_4h: List[dict] = []
+        self.candles_1h = CandleBuffer(cap=300)
+        self.candles_4h = CandleBuffer(cap=300)
 
 
 # ============================================================
 # Helpers
 # ============================================================
-def compute_atr(candles: List[dict], period: int) -> Optional[float]:
-    if len(candles) < period + 2:
-        return None
-    atr = ATR(period)
-    atr_val = None
-    for c in candles:
-        atr_val = atr.update(float(c["high"]), float(c["low"]), float(c["close"]))
-    return atr_val
-
-
-def liquidity_usd_last_n(candles: List[dict], volumes: List[float], n: int = 20) -> float:
-    if not candles or not volumes:
+def liquidity_usd_last_n(candles: CandleBuffer, n: int = 20) -> float:
+    if not len(candles):
         return 0.0
-    n = min(n, len(candles), len(volumes))
-    close = float(candles[-1]["close"])
-    v_sum = float(sum(volumes[-n:]))
+    close = float(candles.closes[-1])
+    v_sum = float(candles.volumes[-n:].sum())
     return v_sum * close
 
 
 def compute_entry(close_price: float, direction: str) -> float:
-    mode = str(getattr(CFG, "ENTRY_MODE", "adaptive")).lower()
-    pullback = float(getattr(CFG, "ENTRY_PULLBACK_PCT", 0.003))
-    breakout = float(getattr(CFG, "ENTRY_BREAKOUT_PCT", 0.0015))
+    pullback = ENTRY_PULLBACK_PCT
+    breakout = ENTRY_BREAKOUT_PCT
 
-    if mode != "adaptive":
+    if ENTRY_MODE != "adaptive":
         return close_price
 
     if MARKET_REGIME.upper() == "TREND":
@@ -248,23 +270,48 @@ def compute_entry(close_price: float, direction: str) -> float:
     return close_price * (1 + breakout) if direction == "LONG" else close_price * (1 - breakout)
 
 
+# ============================================================
+# WS SETTINGS
+# ============================================================
+# Binance stream: JSON ASCII ngắn, không nén -> tắt permessage-deflate, bỏ giới hạn size
+WS_OPTS = dict(heartbeat=30, compress=0, autoping=True, receive_timeout=None, max_msg_size=0)
+_WS_TEXT = aiohttp.WSMsgType.TEXT
+_WS_BINARY = aiohttp.WSMsgType.BINARY
+_WS_ERROR = aiohttp.WSMsgType.ERROR
+
+
 # ============================================================
 # WS: BOOK TICKER
 # ============================================================
-async def ws_bookticker(states: Dict[str, SymbolState], url: str):
+async def ws_bookticker(states: Dict[str, SymbolState], url: str, session: aiohttp.ClientSession):
+    # bind local cho per-frame path (LOAD_FAST thay vì LOAD_GLOBAL / LOAD_ATTR)
+    decode = decode_bookticker
+    get_state = states.get
+    ws_text, ws_binary, ws_error = _WS_TEXT, _WS_BINARY, _WS_ERROR
+
+    fails = 0
     while True:
         try:
-            async with aiohttp.ClientSession() as s:
-                async with s.ws_connect(url, heartbeat=30) as ws:
-                    async for msg in ws:
-                        data = json.loads(msg.data).get("data", {})
-                        sym = data.get("s")
-                        if sym in states:
-                            states[sym].bid = float(data["b"])
-                            states[sym].ask = float(data["a"])
+            async with session.ws_connect(url, **WS_OPTS) as ws:
+                fails = 0
+                async for msg in ws:
+                    t = msg.type
+                    if t is not ws_text and t is not ws_binary:
+                        # PING/PONG do autoping xử lý; ERROR -> thoát để reconnect
+                        if t is ws_error:
+                            break
+                        continue
+                    bt = decode(msg.data)
+                    if bt is None:
+                        continue
+                    st = get_state(bt.s)
+                    if st is not None:
+                        st.bid = bt.b
+                        st.ask = bt.a
         except Exception as e:
             print("bookticker error:", e)
-            await asyncio.sleep(5)
+            fails += 1
+            await asyncio.sleep(backoff_s(fails))
 
 
 # ============================================================
@@ -279,259 +326,359 @@ async def nav_monitor():
         dd = ddm.state()
         total_risk = pos_mgr.total_risk_usd() if hasattr(pos_mgr, "total_risk_usd") else 0.0
 
-        await send_telegram(
-            f"📊 SIM STATUS\n"
-            f"NAV: {stats['nav']:.2f} USDT | Peak: {dd.peak_nav:.2f}\n"
-            f"DD: {dd.dd_pct*100:.2f}% | Regime: {MARKET_REGIME} | Panic: {MARKET_PANIC}\n"
-            f"Open positions: {len(sim.positions)} | Total risk: {total_risk:.2f} USDT\n\n"
-            f"📈 Performance\n"
-            f"Trades: {stats['total']} | Wins: {stats['wins']} | Losses: {stats['losses']}\n"
-            f"Winrate: {stats['winrate']:.2f}% | Total PnL: {stats['pnl']:.2f} USDT"
+        tg_send(
+            fmt_status_message(
+                stats, dd.peak_nav, dd.dd_pct, MARKET_REGIME, MARKET_PANIC, len(sim.positions), total_risk
+            )
         )
 
 
 # ============================================================
-# WS: AGG TRADE (engine)
+# REGIME WORKER (BTC/ETH proxy -> MARKET_REGIME)
 # ============================================================
-async def ws_aggtrade(states: Dict[str, SymbolState], url: str):
-    await send_telegram(
+async def regime_worker(q: asyncio.Queue):
+    """
+    Resample tick (sym, sec, mid) của proxy thành nến 1h/4h và chạy MRE,
+    tách khỏi ws_aggtrade để regime không chặn reader.
+    """
+    global MARKET_REGIME, MARKET_PANIC, LAST_REGIME
+
+    proxy_states = {s: ProxyState() for s in REGIME_PROXIES}
+    # dict view cho MRE dựng 1 lần (CandleBuffer cập nhật in-place)
+    regime_1h = {k: v.candles_1h for k, v in proxy_states.items()}
+    regime_4h = {k: v.candles_4h for k, v in proxy_states.items()}
+    # bitmask proxy đã có nến 1h mới; đủ cả BTC+ETH mới chạy MRE
+    proxy_bit = {k: 1 << i for i, k in enumerate(proxy_states)}
+    all_fresh = (1 << len(proxy_states)) - 1
+    fresh_1h = 0
+
+    while True:
+        sym, sec, mid = await q.get()
+        # task_done sau mỗi tick: proxy worker join() queue trước khi decide nến đóng giờ
+        try:
+            ps = proxy_states[sym]
+            c1, d1 = ps.r1h.update(sec, mid, 0.0)
+            if d1 and c1:
+                ps.candles_1h.append(c1.open, c1.high, c1.low, c1.close, c1.volume)
+            c4, d4 = ps.r4h.update(sec, mid, 0.0)
+            if d4 and c4:
+                ps.candles_4h.append(c4.open, c4.high, c4.low, c4.close, c4.volume)
+
+            if d1 and c1:
+                fresh_1h |= proxy_bit[sym]
+            if fresh_1h != all_fresh:
+                continue
+            fresh_1h = 0
+
+            try:
+                rr_state = MRE.update(regime_1h, regime_4h)
+            except Exception as e:
+                print("regime error:", e)
+                continue
+            MARKET_REGIME = rr_state.regime
+            MARKET_PANIC = rr_state.panic
+            if rr_state.regime != LAST_REGIME:
+                if LAST_REGIME is not None and REGIME_NOTIFY:
+                    tg_send(fmt_regime_message(rr_state.regime, rr_state.reason))
+                LAST_REGIME = rr_state.regime
+        finally:
+            q.task_done()
+
+
+# ============================================================
+# SYMBOL WORKER (engine)
+# ============================================================
+async def symbol_worker(sym: str, st: SymbolState, q: asyncio.Queue, regime_q: asyncio.Queue):
+    """
+    Xử lý tick (sec, qty) của 1 symbol: catch-up từng giây, đóng nến MAIN, SIM + entry.
+    Mỗi symbol 1 task -> symbol nặng không chặn reader / symbol khác.
+    """
+    is_proxy = sym in REGIME_PROXIES
+
+    while True:
+        sec, qty = await q.get()
+        try:
+            if st.cur_sec is None:
+                st.cur_sec = sec
+
+            while sec > st.cur_sec:
+                mid = st.mid()
+                if mid:
+
+                    # ---- REGIME (BTC/ETH): chỉ đẩy tick sang regime_worker
+                    # (await put: queue đầy thì chờ, không bỏ tick -> không mất nến 1h)
+                    if is_proxy:
+                        await regime_q.put((sym, st.cur_sec, mid))
+
+                    # ---- MAIN candle close
+                    closed, did = st.r_main.update(st.cur_sec, mid, st.vol_bucket)
+                    if did and closed:
+                        st.candles.append(closed.open, closed.high, closed.low, closed.close, closed.volume)
+                        st.atr.update(closed.high, closed.low, closed.close)
+
+                        # 1) update existing position
+                        if SIM_ENABLED:
+                            close_info = sim.update_by_candle(sym, closed)
+                            if close_info:
+                                pos_mgr.close_position(sym)
+                                pos_mgr.update_nav(sim.nav)
+
+                                ddm.update(sim.nav)
+                                stats = sim.summary()
+                                dd = ddm.state()
+
+                                tg_send(fmt_close_message(sym, close_info, sim.nav, dd.dd_pct, stats))
+
+                        # proxy: nến 1h cũng đóng ở tick này -> chờ regime_worker áp dụng hết
+                        # tick đã đẩy để decide bằng regime của giờ vừa đóng (như bản inline cũ)
+                        if is_proxy and st.cur_sec // 3600 != closed.start_ts // 3600:
+                            await regime_q.join()
+
+                        # 2) decide open (cooldown theo giờ sàn: sec của message, không gọi time.time())
+                        now = sec
+                        if now - st.last_main >= COOLDOWN_SEC_MAIN:
+                            st.last_main = now
+
+                            ddm.update(sim.nav)
+                            dd_snap = ddm.snapshot()
+                            if not dd_snap.can_trade:
+                                continue
+
+                            sig = check_signal(
+                                sym,
+                                st.candles,
+                                st.spread(),
+                                mode="main",
+                                market_regime=MARKET_REGIME,
+                                market_panic=MARKET_PANIC,
+                            )
+                            if not sig:
+                                continue
+                            if sim.has_pos(sym):
+                                continue
+
+                            # liquidity filter
+                            liq = liquidity_usd_last_n(st.candles, n=20)
+                            if liq < MIN_LIQUIDITY_USD:
+                                continue
+
+                            atr_val = st.atr.value if len(st.candles) >= ATR_PERIOD + 2 else None
+                            if atr_val is None:
+                                continue
+
+                            direction = str(sig["direction"]).upper()
+                            entry = compute_entry(float(closed.close), direction)
+
+                            # decision_engine (moved out of main)
+                            dec = decide_trade(
+                                market_regime=MARKET_REGIME,
+                                market_panic=MARKET_PANIC,
+                                mode="main",
+                                direction=direction,
+                                score=int(sig.get("score", 0)),
+                                high_conf=bool(sig.get("high_conf", False)),
+                                base_rr=SIM_RR,
+                                base_sl_atr_mult=SL_ATR_MULT,
+                            )
+                            if not dec.allow:
+                                continue
+
+                            # risk multiplier from drawdown + decision
+                            risk_mult = dd_snap.risk_mult * dec.risk_mult
+
+                            rp: RiskPlan = build_risk_plan(
+                                symbol=sym,
+                                direction=direction,
+                                entry=entry,
+                                atr_value=float(atr_val),
+                                nav_usd=float(sim.nav),
+                                mode="main",
+                                cfg=CFG,
+                                rr=float(dec.rr),
+                                risk_multiplier=float(risk_mult),
+                                sl_atr_mult=float(dec.sl_atr_mult),
+                                target_vol_pct=TARGET_VOL_PCT,
+                            )
+
+                            # view numpy (không copy / box float); open_position tự copy
+                            hist = st.candles.closes[-80:]
+                            ok, _ = pos_mgr.can_open(
+                                symbol=sym,
+                                risk_usd=float(rp.risk_usd),
+                                new_prices=hist,
+                            )
+                            if not ok:
+                                continue
+
+                            filled_entry = sim._apply_slippage_open(rp.direction, rp.entry)
+                            dist_sl = abs(rp.entry - rp.sl)
+                            dist_tp = abs(rp.tp - rp.entry)
+
+                            if rp.direction == "LONG":
+                                sl = filled_entry - dist_sl
+                                tp = filled_entry + dist_tp
+                            else:
+                                sl = filled_entry + dist_sl
+                                tp = filled_entry - dist_tp
+
+                            sim.open(
+                                SimPosition(
+                                    symbol=sym,
+                                    direction=rp.direction,
+                                    qty=float(rp.qty),
+                                    entry=float(filled_entry),
+                                    sl=float(sl),
+                                    tp=float(tp),
+                                    risk_usd=float(rp.risk_usd),
+                                    opened_at=time.time(),
+                                    rr=float(rp.rr),
+                                )
+                            )
+
+                            pos_mgr.open_position(
+                                symbol=sym,
+                                direction=rp.direction,
+                                qty=float(rp.qty),
+                                entry=float(filled_entry),
+                                sl=float(sl),
+                                tp=float(tp),
+                                risk_usd=float(rp.risk_usd),
+                                price_history=hist,
+                            )
+                            pos_mgr.update_nav(sim.nav)
+
+                            ddm.update(sim.nav)
+                            dd = ddm.state()
+
+                            tg_send(
+                                fmt_open_message(
+                                    sym, rp.direction, filled_entry, rp.qty, sl, tp, rp.risk_usd, rp.rr,
+                                    sim.nav, dd.dd_pct, liq, dec.reason, rp.notes,
+                                )
+                            )
+
+                        st.vol_bucket = 0.0
+
+                    # catch-up: các giây còn lại trong bucket MAIN hiện tại (mid không đổi,
+                    # không đóng nến; bucket 1h/4h của proxy cũng không đổi) -> 1 bước
+                    skip = min(sec, st.r_main.end_ts) - st.cur_sec - 1
+                    if skip > 0:
+                        st.r_main.advance(skip, mid, st.vol_bucket)
+                        st.cur_sec += skip
+                else:
+                    # chưa có bid/ask: không có gì để xử lý cho các giây này
+                    st.cur_sec = sec
+                    break
+
+                st.cur_sec += 1
+
+            st.vol_bucket += qty
+        except Exception as e:
+            print("symbol worker error:", sym, e)
+
+
+# ============================================================
+# WS: AGG TRADE (reader -> per-symbol queue)
+# ============================================================
+async def ws_aggtrade(
+    states: Dict[str, SymbolState],
+    url: str,
+    session: aiohttp.ClientSession,
+    regime_q: asyncio.Queue,
+):
+    tg_send(
         "✅ SIM TRADING BOT RUNNING\n"
         f"symbols={len(states)} | MAIN=15m\n"
         f"SIM={'ON' if SIM_ENABLED else 'OFF'} | NAV={sim.nav:.2f} | BaseRR={SIM_RR}"
     )
 
-    if "BTCUSDT" not in states or "ETHUSDT" not in states:
+    if any(p not in states for p in REGIME_PROXIES):
         raise RuntimeError("Regime proxies must be included in FALLBACK_SYMBOLS (BTCUSDT/ETHUSDT)")
 
-    proxy_states = {s: ProxyState() for s in ("BTCUSDT", "ETHUSDT")}
-    global MARKET_REGIME, MARKET_PANIC, LAST_REGIME
-
-    while True:
-        try:
-            async with aiohttp.ClientSession() as s:
-                async with s.ws_connect(url, heartbeat=30) as ws:
+    # reader chỉ decode + dispatch; phần nặng chạy trong symbol_worker
+    queues: Dict[str, asyncio.Queue] = {s: asyncio.Queue(maxsize=SYMBOL_QUEUE_SIZE) for s in states}
+    workers = [asyncio.create_task(symbol_worker(s, states[s], queues[s], regime_q)) for s in states]
+
+    # bind local cho per-frame path (LOAD_FAST thay vì LOAD_GLOBAL / LOAD_ATTR)
+    decode = decode_aggtrade
+    get_queue = queues.get
+    ws_text, ws_binary, ws_error = _WS_TEXT, _WS_BINARY, _WS_ERROR
+
+    fails = 0
+    try:
+        while True:
+            try:
+                async with session.ws_connect(url, **WS_OPTS) as ws:
+                    fails = 0
                     async for msg in ws:
-                        data = json.loads(msg.data).get("data", {})
-                        sym = data.get("s")
-                        if sym not in states:
+                        t = msg.type
+                        if t is not ws_text and t is not ws_binary:
+                            # PING/PONG do autoping xử lý; ERROR -> thoát để reconnect
+                            if t is ws_error:
+                                break
                             continue
-
-                        st = states[sym]
-                        sec = data["T"] // 1000
-                        qty = float(data["q"])
-
-                        if st.cur_sec is None:
-                            st.cur_sec = sec
-
-                        while sec > st.cur_sec:
-                            mid = st.mid()
-                            if mid:
-
-                                # ---- REGIME UPDATE (BTC/ETH)
-                                if sym in proxy_states:
-                                    ps = proxy_states[sym]
-                                    c1, d1 = ps.r1h.update(st.cur_sec, mid, 0.0)
-                                    if d1 and c1:
-                                        ps.candles_1h.append({"open": c1.open, "high": c1.high, "low": c1.low, "close": c1.close})
-                                        ps.candles_1h = ps.candles_1h[-300:]
-                                    c4, d4 = ps.r4h.update(st.cur_sec, mid, 0.0)
-                                    if d4 and c4:
-                                        ps.candles_4h.append({"open": c4.open, "high": c4.high, "low": c4.low, "close": c4.close})
-                                        ps.candles_4h = ps.candles_4h[-300:]
-
-                                    if d1 and c1:
-                                        rr_state = MRE.update(
-                                            {k: v.candles_1h for k, v in proxy_states.items()},
-                                            {k: v.candles_4h for k, v in proxy_states.items()},
-                                        )
-                                        MARKET_REGIME = rr_state.regime
-                                        MARKET_PANIC = rr_state.panic
-                                        if rr_state.regime != LAST_REGIME:
-                                            LAST_REGIME = rr_state.regime
-
-                                # ---- MAIN candle close
-                                closed, did = st.r_main.update(st.cur_sec, mid, st.vol_bucket)
-                                if did and closed:
-                                    candle = {"open": closed.open, "high": closed.high, "low": closed.low, "close": closed.close}
-                                    st.candles.append(candle)
-                                    st.volumes.append(closed.volume)
-                                    st.candles = st.candles[-400:]
-                                    st.volumes = st.volumes[-400:]
-
-                                    # 1) update existing position
-                                    if SIM_ENABLED:
-                                        close_info = sim.update_by_candle(sym, candle)
-                                        if close_info:
-                                            pos_mgr.close_position(sym)
-                                            pos_mgr.update_nav(sim.nav)
-
-                                            ddm.update(sim.nav)
-                                            stats = sim.summary()
-                                            dd = ddm.state()
-
-                                            await send_telegram(
-                                                f"🔴 CLOSE {sym}\n"
-                                                f"Exit: {float(close_info['exit']):.6f}\n"
-                                                f"Result: {close_info['result']} | PnL: {float(close_info['pnl']):.2f} USDT\n"
-                                                f"NAV: {sim.nav:.2f} | DD: {dd.dd_pct*100:.2f}%\n"
-                                                f"Trades: {stats['total']} | W/L: {stats['wins']}/{stats['losses']} ({stats['winrate']:.1f}%)"
-                                            )
-
-                                    # 2) decide open
-                                    now = int(time.time())
-                                    if now - st.last_main >= int(getattr(CFG, "COOLDOWN_SEC_MAIN", 900)):
-                                        st.last_main = now
-
-                                        ddm.update(sim.nav)
-                                        can, _ = ddm.can_trade()
-                                        if not can:
-                                            continue
-
-                                        sig = check_signal(
-                                            sym,
-                                            st.candles,
-                                            st.volumes,
-                                            st.spread(),
-                                            mode="main",
-                                            market_regime=MARKET_REGIME,
-                                            market_panic=MARKET_PANIC,
-                                        )
-                                        if not sig:
-                                            continue
-                                        if sim.has_pos(sym):
-                                            continue
-
-                                        # liquidity filter
-                                        min_liq = float(getattr(CFG, "MIN_LIQUIDITY_USD", 5_000_000.0))
-                                        liq = liquidity_usd_last_n(st.candles, st.volumes, n=20)
-                                        if liq < min_liq:
-                                            continue
-
-                                        atr_val = compute_atr(st.candles, int(getattr(CFG, "ATR_SHORT", 5)))
-                                        if atr_val is None:
-                                            continue
-
-                                        direction = str(sig["direction"]).upper()
-                                        entry = compute_entry(float(closed.close), direction)
-
-                                        # decision_engine (moved out of main)
-                                        base_slm = float(getattr(CFG, "SL_ATR_MULT", 1.5))
-                                        dec = decide_trade(
-                                            market_regime=MARKET_REGIME,
-                                            market_panic=MARKET_PANIC,
-                                            mode="main",
-                                            direction=direction,
-                                            score=int(sig.get("score", 0)),
-                                            high_conf=bool(sig.get("high_conf", False)),
-                                            base_rr=float(getattr(CFG, "SIM_RR", 2.0)),
-                                            base_sl_atr_mult=base_slm,
-                                        )
-                                        if not dec.allow:
-                                            continue
-
-                                        # risk multiplier from drawdown + decision
-                                        risk_mult = ddm.risk_multiplier() * dec.risk_mult
-
-                                        rp: RiskPlan = build_risk_plan(
-                                            symbol=sym,
-                                            direction=direction,
-                                            entry=entry,
-                                            atr_value=float(atr_val),
-                                            nav_usd=float(sim.nav),
-                                            mode="main",
-                                            cfg=CFG,
-                                            rr=float(dec.rr),
-                                            risk_multiplier=float(risk_mult),
-                                            sl_atr_mult=float(dec.sl_atr_mult),
-                                            target_vol_pct=float(getattr(CFG, "TARGET_VOL_PCT", 0.015)),
-                                        )
-
-                                        ok, _ = pos_mgr.can_open(
-                                            symbol=sym,
-                                            risk_usd=float(rp.risk_usd),
-                                            new_prices=[c["close"] for c in st.candles[-80:]],
-                                        )
-                                        if not ok:
-                                            continue
-
-                                        filled_entry = sim._apply_slippage_open(rp.direction, rp.entry)
-                                        dist_sl = abs(rp.entry - rp.sl)
-                                        dist_tp = abs(rp.tp - rp.entry)
-
-                                        if rp.direction == "LONG":
-                                            sl = filled_entry - dist_sl
-                                            tp = filled_entry + dist_tp
-                                        else:
-                                            sl = filled_entry + dist_sl
-                                            tp = filled_entry - dist_tp
-
-                                        sim.open(
-                                            SimPosition(
-                                                symbol=sym,
-                                                direction=rp.direction,
-                                                qty=float(rp.qty),
-                                                entry=float(filled_entry),
-                                                sl=float(sl),
-                                                tp=float(tp),
-                                                risk_usd=float(rp.risk_usd),
-                                                opened_at=time.time(),
-                                                rr=float(rp.rr),
-                                            )
-                                        )
-
-                                        pos_mgr.open_position(
-                                            symbol=sym,
-                                            direction=rp.direction,
-                                            qty=float(rp.qty),
-                                            entry=float(filled_entry),
-                                            sl=float(sl),
-                                            tp=float(tp),
-                                            risk_usd=float(rp.risk_usd),
-                                            price_history=[c["close"] for c in st.candles[-80:]],
-                                        )
-                                        pos_mgr.update_nav(sim.nav)
-
-                                        ddm.update(sim.nav)
-                                        dd = ddm.state()
-
-                                        await send_telegram(
-                                            f"🟢 OPEN {rp.direction} {sym}\n"
-                                            f"Entry: {filled_entry:.6f}\n"
-                                            f"Qty: {rp.qty:.4f}\n"
-                                            f"SL: {sl:.6f}\n"
-                                            f"TP: {tp:.6f}\n"
-                                            f"Risk: {rp.risk_usd:.2f} USDT | RR: {rp.rr:.2f}\n"
-                                            f"NAV: {sim.nav:.2f} | DD: {dd.dd_pct*100:.2f}%\n"
-                                            f"liq≈{liq:,.0f}$ | decision={dec.reason} | {rp.notes}"
-                                        )
-
-                                    st.vol_bucket = 0.0
-
-                            st.cur_sec += 1
-
-                        st.vol_bucket += qty
-
-        except Exception as e:
-            print("aggtrade error:", e)
-            await asyncio.sleep(backoff_s(1))
+                        agg = decode(msg.data)
+                        if agg is None:
+                            continue
+                        q = get_queue(agg.s)
+                        if q is None:
+                            continue
+                        item = (agg.T // 1000, agg.q)
+                        try:
+                            q.put_nowait(item)
+                        except asyncio.QueueFull:
+                            # worker tụt lại: bỏ tick cũ nhất, giữ tick mới
+                            q.get_nowait()
+                            q.put_nowait(item)
+
+            except Exception as e:
+                print("aggtrade error:", e)
+                fails += 1
+                await asyncio.sleep(backoff_s(fails))
+    finally:
+        for w in workers:
+            w.cancel()
 
 
 # ============================================================
 # MAIN
 # ============================================================
 async def main():
+    # JIT compile trước khi nhận tick (tránh spike ở candle close đầu tiên)
+    warmup_kernels()
+    warmup_decide()
+    _sl_tp_kernel(1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)  # SIM SL/TP check
+
+    # eager task (3.12+): coroutine xong không cần suspend thì bỏ qua vòng scheduler
+    eager = getattr(asyncio, "eager_task_factory", None)
+    if eager is not None:
+        asyncio.get_running_loop().set_task_factory(eager)
+
     states = {s: SymbolState() for s in FALLBACK_SYMBOLS}
 
     ws_base = CFG.BINANCE_FUTURES_WS
     url_book = ws_base + "?streams=" + "/".join(f"{s.lower()}@bookTicker" for s in states)
     url_trade = ws_base + "?streams=" + "/".join(f"{s.lower()}@aggTrade" for s in states)
 
-    await asyncio.gather(
-        ws_bookticker(states, url_book),
-        ws_aggtrade(states, url_trade),
-        nav_monitor(),
-    )
+    # 1 session cho cả 2 websocket suốt đời process: reconnect chỉ ws_connect lại
+    # (giữ connector / DNS cache)
+    connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+    regime_q: asyncio.Queue = asyncio.Queue(maxsize=1024)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(
+            ws_bookticker(states, url_book, session),
+            ws_aggtrade(states, url_trade, session, regime_q),
+            regime_worker(regime_q),
+            nav_monitor(),
+            tg_worker(),
+        )
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop (libuv) nếu có, fallback event loop mặc định
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Dict, List, Optional
 
+from app.candle_buffer import CandleBuffer
 from app.config import CFG
-from app.indicators import ATR
+from app.indicators import wilder_atr
 
 REGIMES = ("NORMAL", "TREND", "RANGE", "PANIC", "RECOVERY")
 
@@ -24,7 +25,7 @@ class RegimeResult:
 class MarketRegimeEngine:
     """
     Regime engine dùng BTC/ETH làm proxy.
-    - Input: candles_1h, candles_4h cho BTCUSDT/ETHUSDT
+    - Input: candles_1h, candles_4h (CandleBuffer) cho BTCUSDT/ETHUSDT
     - Output: NORMAL / TREND / RANGE / PANIC / RECOVERY
     """
 
@@ -37,19 +38,17 @@ class MarketRegimeEngine:
     # Helpers
     # -----------------------------
     @staticmethod
-    def _atr_pct(candles: List[dict], period: int) -> Optional[float]:
+    def _atr_pct(candles: CandleBuffer, period: int) -> Optional[float]:
         """
         ATR% = ATR / close
         """
         if len(candles) < period + 2:
             return None
-        atr = ATR(period)
-        v = None
-        for c in candles:
-            v = atr.update(c["high"], c["low"], c["close"])
+        closes = candles.closes
+        v = wilder_atr(candles.highs, candles.lows, closes, period)
         if v is None:
             return None
-        last_close = candles[-1]["close"]
+        last_close = float(closes[-1])
         if not last_close:
             return None
         return v / last_close
@@ -65,8 +64,8 @@ class MarketRegimeEngine:
         return val
 
     @staticmethod
-    def _ema_gap(candles: List[dict], fast: int, slow: int) -> Optional[float]:
-        closes = [c["close"] for c in candles]
+    def _ema_gap(candles: CandleBuffer, fast: int, slow: int) -> Optional[float]:
+        closes = candles.closes.tolist()
         ef = MarketRegimeEngine._ema(closes[-slow:], fast)
         es = MarketRegimeEngine._ema(closes[-slow:], slow)
         if ef is None or es is None or es == 0:
@@ -74,8 +73,8 @@ class MarketRegimeEngine:
         return abs(ef - es) / es
 
     @staticmethod
-    def _trend_dir(candles: List[dict], fast: int, slow: int) -> Optional[str]:
-        closes = [c["close"] for c in candles]
+    def _trend_dir(candles: CandleBuffer, fast: int, slow: int) -> Optional[str]:
+        closes = candles.closes.tolist()
         if len(closes) < slow:
             return None
         ef = MarketRegimeEngine._ema(closes[-slow:], fast)
@@ -89,8 +88,8 @@ class MarketRegimeEngine:
     # -----------------------------
     def update(
         self,
-        candles_1h: Dict[str, List[dict]],
-        candles_4h: Dict[str, List[dict]],
+        candles_1h: Dict[str, CandleBuffer],
+        candles_4h: Dict[str, CandleBuffer],
     ) -> RegimeResult:
         proxies = ("BTCUSDT", "ETHUSDT")
 
@@ -123,9 +122,8 @@ class MarketRegimeEngine:
                 continue
             atr_ratios.append(atr5 / atr20)
 
-            last = c1[-1]
-            o = last["open"]
-            cl = last["close"]
+            o = float(c1.opens[-1])
+            cl = float(c1.closes[-1])
             if o and (cl - o) / o <= -PANIC_DROP_PCT:
                 drop_flags.append(True)
             else:
@@ -141,8 +139,8 @@ class MarketRegimeEngine:
             # recovery: atr_ratio đã hạ + BTC/ETH có candle xanh (1H)
             green_ok = True
             for sym in proxies:
-                last = candles_1h[sym][-1]
-                if last["close"] <= last["open"]:
+                c1 = candles_1h[sym]
+                if c1.closes[-1] <= c1.opens[-1]:
                     green_ok = False
                     break
             if (atr_ratio > 0 and atr_ratio <= RECOVERY_ATR_RATIO) and green_ok:
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 @dataclass
@@ -15,7 +17,7 @@ class Position:
     tp: Optional[float]
     opened_at: float
     risk_usd: float
-    price_history: List[float] = field(default_factory=list)
+    price_history: Sequence[float] = field(default_factory=list)
 
 
 class PositionManager:
@@ -64,10 +66,11 @@ class PositionManager:
     # -----------------------------
     # Correlation filter
     # -----------------------------
-    def _corr_ok(self, new_prices: Optional[List[float]]) -> Tuple[bool, str]:
+    def _corr_ok(self, new_prices: Optional[Sequence[float]]) -> Tuple[bool, str]:
         if self.max_correlation is None:
             return True, "ok"
-        if not new_prices or len(new_prices) < 20:
+        # len() thay vì truthiness: new_prices có thể là numpy view
+        if new_prices is None or len(new_prices) < 20:
             return True, "ok"
 
         try:
@@ -76,7 +79,7 @@ class PositionManager:
             return True, "ok"
 
         for p in self.positions.values():
-            if not p.price_history or len(p.price_history) < 20:
+            if len(p.price_history) < 20:
                 continue
             try:
                 c = correlation(new_prices, p.price_history)
@@ -95,7 +98,7 @@ class PositionManager:
         *,
         symbol: str,
         risk_usd: float,
-        new_prices: Optional[List[float]] = None,
+        new_prices: Optional[Sequence[float]] = None,
     ) -> Tuple[bool, str]:
         if self.has_position(symbol):
             return False, "position_exists"
@@ -126,7 +129,7 @@ class PositionManager:
         sl: float,
         tp: Optional[float],
         risk_usd: float,
-        price_history: Optional[List[float]] = None,
+        price_history: Optional[Sequence[float]] = None,
     ) -> None:
         self.positions[symbol] = Position(
             symbol=symbol,
@@ -137,7 +140,8 @@ class PositionManager:
             tp=float(tp) if tp is not None else None,
             opened_at=time.time(),
             risk_usd=float(risk_usd),
-            price_history=list(price_history) if price_history else [],
+            # copy: price_history thường là view vào ring buffer của CandleBuffer
+            price_history=np.array(price_history, dtype=np.float64) if price_history is not None else [],
         )
 
     def close_position(self, symbol: str) -> None:
@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Candle:
     open: float
     high: float
@@ -15,6 +15,8 @@ class Candle:
 
 
 class TimeframeResampler:
+    __slots__ = ("tf", "cur_start", "o", "h", "l", "c", "vol")
+
     def __init__(self, tf_sec: int):
         self.tf = tf_sec
         self.cur_start: int | None = None
@@ -52,3 +54,17 @@ class TimeframeResampler:
         self.vol = vol
 
         return closed, True
+
+    @property
+    def end_ts(self) -> int | None:
+        return None if self.cur_start is None else self.cur_start + self.tf
+
+    def advance(self, n: int, price: float, vol: float) -> None:
+        """
+        Tương đương n lần update(sec, price, vol) liên tiếp trong CÙNG bucket hiện tại
+        (không đóng nến) -> O(1) thay vì lặp từng giây.
+        """
+        self.c = price
+        self.h = max(self.h, price)  # type: ignore[arg-type]
+        self.l = min(self.l, price)  # type: ignore[arg-type]
+        self.vol += vol * n
@@ -1,18 +1,105 @@
 from __future__ import annotations
 
+import asyncio
+
 import aiohttp
 
 from app.config import CFG
 
 
+_TG_URL = f"https://api.telegram.org/bot{CFG.TELEGRAM_BOT_TOKEN}/sendMessage"
+
+# 1 session dùng chung cho mọi lần gửi (giữ keep-alive / DNS cache tới api.telegram.org),
+# tạo lazy vì ClientSession cần event loop đang chạy
+_TG_SESSION: aiohttp.ClientSession | None = None
+
+
+def _tg_session() -> aiohttp.ClientSession:
+    global _TG_SESSION
+    if _TG_SESSION is None or _TG_SESSION.closed:
+        _TG_SESSION = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0, ttl_dns_cache=300))
+    return _TG_SESSION
+
+
+async def close_telegram() -> None:
+    global _TG_SESSION
+    if _TG_SESSION is not None and not _TG_SESSION.closed:
+        await _TG_SESSION.close()
+    _TG_SESSION = None
+
+
 async def send_telegram(text: str) -> None:
-    url = f"https://api.telegram.org/bot{CFG.TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         "chat_id": CFG.TELEGRAM_CHAT_ID,
         "text": text,
         "disable_web_page_preview": True,
     }
-    async with aiohttp.ClientSession() as s:
-        async with s.post(url, json=payload) as r:
-            # swallow response; if you want debug, print await r.text()
-            _ = await r.text()
+    async with _tg_session().post(_TG_URL, json=payload) as r:
+        # swallow response; if you want debug, print await r.text()
+        _ = await r.text()
+
+
+# ============================================================
+# QUEUE: gửi không block caller, worker gom tin đang chờ thành 1 request
+# ============================================================
+_TG_MAX_LEN = 4096  # giới hạn text của Telegram sendMessage
+_TG_SEP = "\n---\n"
+# debounce: sau tin đầu tiên chờ thêm 1 chút để gom burst (nhiều symbol cùng lúc) vào 1 POST
+_TG_DEBOUNCE_S = float(CFG.TG_DEBOUNCE_SEC)
+# rate limit: khoảng cách tối thiểu giữa 2 POST (Bot API ~30 msg/s); chỉ sleep khi cần
+_TG_MIN_INTERVAL_S = 1.0 / 30
+_TG_Q: asyncio.Queue[str] = asyncio.Queue(maxsize=256)
+
+
+def tg_send(text: str) -> None:
+    """
+    Đưa message vào queue cho tg_worker; queue đầy thì bỏ message cũ nhất.
+    """
+    try:
+        _TG_Q.put_nowait(text)
+    except asyncio.QueueFull:
+        _TG_Q.get_nowait()
+        _TG_Q.put_nowait(text)
+
+
+def _coalesce(batch: list[str]) -> list[str]:
+    # bỏ message trùng liên tiếp, ghép phần còn lại sao cho mỗi request <= _TG_MAX_LEN
+    out: list[str] = []
+    cur = ""
+    prev = None
+    for m in batch:
+        if m == prev:
+            continue
+        prev = m
+        if cur and len(cur) + len(_TG_SEP) + len(m) > _TG_MAX_LEN:
+            out.append(cur)
+            cur = m
+        else:
+            cur = f"{cur}{_TG_SEP}{m}" if cur else m
+    if cur:
+        out.append(cur)
+    return out
+
+
+async def tg_worker() -> None:
+    loop = asyncio.get_running_loop()
+    last_send = float("-inf")
+    try:
+        while True:
+            batch = [await _TG_Q.get()]
+            if _TG_DEBOUNCE_S > 0:
+                await asyncio.sleep(_TG_DEBOUNCE_S)
+            while not _TG_Q.empty():
+                batch.append(_TG_Q.get_nowait())
+
+            for text in _coalesce(batch):
+                delay = _TG_MIN_INTERVAL_S - (loop.time() - last_send)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                last_send = loop.time()
+                try:
+                    await send_telegram(text)
+                except Exception as e:
+                    print("telegram error:", e)
+    finally:
+        await close_telegram()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+from typing import NamedTuple, Optional
+
+# msgspec là optional: có thì decode thẳng vào Struct (bỏ qua key thừa, không dựng dict),
+# không có thì fallback json stdlib.
+# Struct chỉ chứa str/int/float -> gc=False (không track bởi cyclic GC), frozen như NamedTuple fallback
+try:
+    import msgspec  # type: ignore
+    HAS_MSGSPEC = True
+except Exception:
+    msgspec = None  # type: ignore[assignment]
+    HAS_MSGSPEC = False
+
+
+# ============================================================
+# BOOK TICKER  {"stream": ..., "data": {"s": "BTCUSDT", "b": "123.4", "a": "123.5", ...}}
+# ============================================================
+if HAS_MSGSPEC:
+
+    class BookTicker(msgspec.Struct, frozen=True, gc=False):
+        s: str
+        b: float
+        a: float
+
+    class _BookTickerFrame(msgspec.Struct, frozen=True, gc=False):
+        data: BookTicker
+
+    # strict=False: Binance gửi giá dạng string -> parse thẳng ra float
+    _BT_DECODER = msgspec.json.Decoder(_BookTickerFrame, strict=False)
+
+    def decode_bookticker(raw: str | bytes) -> Optional[BookTicker]:
+        try:
+            return _BT_DECODER.decode(raw).data
+        except msgspec.ValidationError:
+            return None
+
+else:
+
+    class BookTicker(NamedTuple):  # type: ignore[no-redef]
+        s: str
+        b: float
+        a: float
+
+    def decode_bookticker(raw: str | bytes) -> Optional[BookTicker]:
+        # combined stream luôn có "data": index thẳng, frame lạ (ack/error) -> None
+        try:
+            data = json.loads(raw)["data"]
+            return BookTicker(data["s"], float(data["b"]), float(data["a"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+# ============================================================
+# AGG TRADE  {"stream": ..., "data": {"e": "aggTrade", "s": ..., "T": 123, "q": "0.01", ...}}
+# chỉ giữ s / T / q, các key khác bị skip lúc parse
+# ============================================================
+if HAS_MSGSPEC:
+
+    class AggTrade(msgspec.Struct, frozen=True, gc=False):
+        s: str
+        T: int
+        q: float
+
+    class _AggTradeFrame(msgspec.Struct, frozen=True, gc=False):
+        data: AggTrade
+
+    _AGG_DECODER = msgspec.json.Decoder(_AggTradeFrame, strict=False)
+
+    def decode_aggtrade(raw: str | bytes) -> Optional[AggTrade]:
+        try:
+            return _AGG_DECODER.decode(raw).data
+        except msgspec.ValidationError:
+            return None
+
+else:
+
+    class AggTrade(NamedTuple):  # type: ignore[no-redef]
+        s: str
+        T: int
+        q: float
+
+    def decode_aggtrade(raw: str | bytes) -> Optional[AggTrade]:
+        try:
+            data = json.loads(raw)["data"]
+            return AggTrade(data["s"], int(data["T"]), float(data["q"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+__all__ = [
+    "HAS_MSGSPEC",
+    "BookTicker",
+    "AggTrade",
+    "decode_bookticker",
+    "decode_aggtrade",
+]